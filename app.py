@@ -1,35 +1,36 @@
 # app.py  ─  AI Excuse Generator  ✨
 import streamlit as st
-import os
 import datetime
+import itertools
+import time
 import urllib.parse
-from io import BytesIO
-from collections import Counter
-
-from dotenv import load_dotenv
-from gtts import gTTS
-from deep_translator import GoogleTranslator
-import openai
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from settings import get_settings
+from favorites_store import FavoritesStore
+from dedup import ExcuseSet
+from warm_pool import WarmPool
+from jobs import JobManager
+from deadline import Deadline
+import http_transport
+import excuse_engine
+from excuse_engine import (
+    CACHE_DB, DEFAULT_RANK, EXCUSE_CANDIDATES, LANGUAGE_CODES, METRICS_FILE, METRICS_LOG, RANK_LABELS,
+    cached_rankings, craft_image_prompt, generate_apology, generate_excuse, generate_proof_image,
+    get_audio_cache, get_executor, get_metrics, get_openrouter_gate, get_response_cache,
+    get_router, get_translation_cache, get_tts_router, make_excuse, parse_candidates, pick_best, rank_excuses,
+    simulate_emergency, sort_by_rank, synthesize_speech,
+)
 
-from flux_ai import FluxImageGenerator
-from PIL import Image
+# gtts, deep_translator, openai, PIL and flux_ai are imported on first use
+# of their feature (see the engine's get_* helpers) to keep cold start fast.
 
 # ─────────────────────────────────────────
 #  ENV / SECRETS
 # ─────────────────────────────────────────
-load_dotenv()
-
-
-def _secret(key: str) -> str:
-    """Try Streamlit secrets first, then .env."""
-    try:
-        return st.secrets[key]
-    except Exception:
-        return os.getenv(key, "")
-
-
-openai.api_key = _secret("OPENROUTER_API_KEY")
-openai.api_base = "https://openrouter.ai/api/v1"
+settings = get_settings()
 
 # ─────────────────────────────────────────
 #  PAGE CONFIG  (must be first Streamlit call)
@@ -347,156 +348,266 @@ hr { border-color: var(--border) !important; }
 
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
+# ─────────────────────────────────────────
+#  CONSTANTS
+# ─────────────────────────────────────────
+FAV_FILE = "favorites.txt"       # legacy store, imported into FAV_DB once
+FAV_DB = "favorites.db"
+HISTORY_MAX = 200                # history is a ring buffer of this many entries
+PAGE_SIZES = [5, 10, 25, 50]     # History & Favs page-size choices
+NEAR_DUP_THRESHOLD = 0.6         # MinHash similarity at which history drops paraphrases
+WARM_POOL_DEPTH = 3              # ready excuses kept per sidebar combination
+WARM_POOL_CONCURRENCY = 2        # combinations refilled in parallel
+WARM_POOL_RATE = 30              # producer calls per minute, all combinations
+WARM_POOL_PREFILL = False        # warm every combination at startup (735 × depth calls)
+JOB_WORKERS = 4                  # background jobs (image proofs, emergency messages)
+JOB_POLL_SECONDS = 1.0           # status refresh interval while a job is pending
+STATS_REFRESH_SECONDS = 5.0      # performance panel refresh interval, while it is open
+GENERATE_DEADLINE = 6.0          # seconds per Generate click; optional stages are cut past it
+CATEGORIES = ["Work", "School", "Health", "Family", "Transport", "Technology", "Weather"]
+SCENARIOS = [
+    "Late to Class", "Missed a Deadline", "Didn't Attend a Meeting",
+    "Family Emergency", "Health Issue", "Can't Make It", "Need Extension",
+]
+URGENCIES = ["Low", "Medium", "High"]
+
 # ─────────────────────────────────────────
 #  SESSION STATE
 # ─────────────────────────────────────────
 for key, default in [
-    ("excuse_history", []),
-    ("favorites", []),
+    ("excuse_history", ExcuseSet(maxlen=HISTORY_MAX, threshold=NEAR_DUP_THRESHOLD)),
     ("total_generated", 0),
     ("last_excuse", ""),
+    ("jobs", {}),                # slot name → background job id
+    ("excuse_queue", {}),        # sidebar combination → ranked candidates not yet shown
 ]:
     if key not in st.session_state:
         st.session_state[key] = default
 
-# ─────────────────────────────────────────
-#  CONSTANTS
-# ─────────────────────────────────────────
-FAV_FILE = "favorites.txt"
-LANGUAGE_CODES = {
-    "English": "en",
-    "Hindi": "hi",
-    "Tamil": "ta",
-    "Telugu": "te",
-    "Spanish": "es",
-}
-
 # ─────────────────────────────────────────
 #  HELPER FUNCTIONS
 # ─────────────────────────────────────────
 
-def load_favorites() -> list:
-    if os.path.exists(FAV_FILE):
-        try:
-            with open(FAV_FILE, "r", encoding="utf-8") as f:
-                return [l.strip() for l in f if l.strip()]
-        except Exception:
-            pass
-    return []
+@st.cache_resource
+def get_favorites_store() -> FavoritesStore:
+    """Favorites for every session; pages are read from it as they're shown."""
+    rankings = excuse_engine.get_rank_cache().disk   # lets "Most believable" sort in SQL
+    return FavoritesStore(FAV_DB, legacy_file=FAV_FILE, rankings=(rankings.path, rankings.table))
 
 
-def save_favorite_to_file(excuse: str) -> bool:
+def save_favorite(excuse: str) -> bool:
     try:
-        if excuse not in load_favorites():
-            with open(FAV_FILE, "a", encoding="utf-8") as f:
-                f.write(excuse + "\n")
-            return True
+        return get_favorites_store().add(excuse)
     except Exception:
-        pass
-    return False
+        return False
 
 
-def call_openai(prompt: str, max_tokens: int = 300, temperature: float = 0.7) -> str:
-    if not openai.api_key:
-        return "❌ OPENROUTER_API_KEY is missing. Add it to Streamlit secrets."
+def ensure_language(text: str, lang: str, deadline: Deadline | None = None) -> str:
     try:
-        response = openai.ChatCompletion.create(
-            model="mistralai/mixtral-8x7b-instruct",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens,
-            headers={
-                "HTTP-Referer": "https://excuse-generator.streamlit.app",
-                "X-Title": "Intelligent Excuse Generator",
-            },
-        )
-        return response["choices"][0]["message"]["content"].strip()
-    except Exception as exc:
-        return f"❌ API error: {exc}"
-
-
-def translate_text(text: str, lang: str) -> str:
-    if lang == "English" or not text or text.startswith("❌"):
-        return text
-    try:
-        return GoogleTranslator(
-            source="auto", target=LANGUAGE_CODES[lang]
-        ).translate(text)
+        return excuse_engine.ensure_language(text, lang, deadline)
     except Exception as exc:
         st.warning(f"Translation skipped: {exc}")
         return text
 
 
-def ai_rank_excuse(excuse_text: str) -> str:
-    prompt = (
-        f'Evaluate this excuse for believability:\n\n"{excuse_text}"\n\n'
-        "Respond with ONLY one of these:\n"
-        "🟢 Highly Believable\n"
-        "🟡 Somewhat Believable\n"
-        "🔴 Less Believable"
-    )
-    result = call_openai(prompt, max_tokens=20, temperature=0.3)
-    return result if not result.startswith("❌") else "🟡 Somewhat Believable"
+def translate_batch(texts: list, lang: str) -> list:
+    translated, failed = excuse_engine.translate_batch(texts, lang)
+    if failed:
+        st.warning(f"Translation skipped for {failed} item(s).")
+    return translated
 
 
-def speak_text(text: str, lang_code: str) -> None:
+def render_stream(tokens, slot, template: str, view=None) -> str:
+    """Progressively render *tokens* into *slot*; return the final text.
+
+    ``view(text)`` picks what to show of the text so far (default: all of it).
+    """
+    view = view or (lambda text: text)
+    text = ""
+    for token in tokens:
+        text += token
+        slot.markdown(template.format(text=view(text) + "▌"), unsafe_allow_html=True)
+    text = text.strip()
+    slot.markdown(template.format(text=view(text)), unsafe_allow_html=True)
+    return text
+
+
+def speak_text(text: str, lang_code: str, deadline: Deadline | None = None) -> None:
     try:
-        tts = gTTS(text=text, lang=lang_code, slow=False)
-        buf = BytesIO()
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        st.audio(buf.read(), format="audio/mp3")
+        audio = synthesize_speech(text, lang_code, deadline=deadline)
     except Exception as exc:
         st.warning(f"Audio generation failed: {exc}")
+        return
+    if audio is None:
+        st.caption("🔇 Audio skipped to answer in time.")
+    else:
+        st.audio(audio, format="audio/mp3")
+
+
+def show_degraded(deadline: Deadline) -> None:
+    if deadline.degraded:
+        st.caption(
+            f"⏳ Kept under {deadline.seconds:g}s by skipping: {', '.join(deadline.degraded)}"
+        )
+
+
+def submit(fn, *args, executor: ThreadPoolExecutor | None = None):
+    """Submit to a worker pool, carrying the session's script context.
+
+    Workers never render, but they do read ``st.cache_resource`` objects,
+    which warn when called from a thread without a context.
+    """
+    ctx = get_script_run_ctx()
 
+    def run():
+        add_script_run_ctx(ctx=ctx)
+        return fn(*args)
 
-def generate_excuse(category: str, scenario: str, urgency: str) -> str:
-    prompt = (
-        f"Write a realistic and believable excuse for someone dealing with '{scenario}' "
-        f"related to {category}, with {urgency} urgency. "
-        "Write it as a natural paragraph (2-4 sentences) that someone would actually say. "
-        "Make it sound genuine and conversational. Do not use bullet points or lists."
+    return (executor or get_executor()).submit(run)
+
+
+@st.cache_resource
+def get_refill_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=WARM_POOL_CONCURRENCY, thread_name_prefix="warm")
+
+
+@st.cache_resource
+def get_warm_pool() -> WarmPool:
+    pool = WarmPool(
+        CACHE_DB,
+        # Fresh generations: cached variants would fill the pool with repeats.
+        # Background: refills never take the rate-limit burst kept for clicks.
+        producer=lambda combo: make_excuse(*combo, fresh=True, background=True),
+        submit=lambda fn, *args: submit(fn, *args, executor=get_refill_executor()),
+        depth=WARM_POOL_DEPTH,
+        rate_per_minute=WARM_POOL_RATE,
     )
-    return call_openai(prompt, max_tokens=300)
+    if WARM_POOL_PREFILL and settings.openrouter_api_key:
+        pool.prefill(itertools.product(CATEGORIES, SCENARIOS, URGENCIES, LANGUAGE_CODES))
+    return pool
+
+
+def timed(fn, *args):
+    """Run ``fn(*args)`` and return ``(result, seconds)``."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def format_timings(timings: dict) -> str:
+    return "⏱️ " + " · ".join(f"{stage} {secs:.2f}s" for stage, secs in timings.items())
+
 
+def paginate(entries: list, key: str, page_size: int) -> tuple:
+    """Return ``(page_entries, offset)``, rendering a page picker if needed.
 
-def simulate_emergency(relation: str, context: str) -> tuple:
-    prompt = (
-        f"Generate a realistic urgent text message from {relation} about a {context}. "
-        "Keep it under 25 words and make it sound genuinely urgent. "
-        "Only return the message text, nothing else."
+    Only the visible page is turned into widgets, so rerun cost and
+    payload size don't grow with the list.
+    """
+    offset = page_offset(len(entries), key, page_size)
+    return entries[offset:offset + page_size], offset
+
+
+def page_offset(total: int, key: str, page_size: int) -> int:
+    """Offset of the page picked for *total* entries; renders the picker."""
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=key
+        )
+    return (page - 1) * page_size
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+    return JobManager(lambda fn, *args: submit(fn, *args, executor=executor))
+
+
+def start_job(slot: str, fn, *args, meta: dict | None = None) -> None:
+    """Run *fn* off the script thread and remember its id under *slot*."""
+    st.session_state.jobs[slot] = get_job_manager().submit(slot, fn, *args, meta=meta)
+
+
+def show_job(slot: str, pending_label: str, render) -> None:
+    """Render the session's *slot* job: a polling status line while it runs,
+    then ``render(job)`` once it has finished.  Only this fragment reruns
+    while polling, so the rest of the app stays interactive."""
+    job_id = st.session_state.jobs.get(slot)
+    job = get_job_manager().get(job_id) if job_id else None
+    if job is None:
+        return
+    polling = not job.done
+
+    @st.fragment(run_every=JOB_POLL_SECONDS if polling else None)
+    def panel():
+        current = get_job_manager().get(job_id)
+        if current is None:
+            return
+        if not current.done:
+            st.info(f"{pending_label} — {current.status} ({current.elapsed:.0f}s)")
+        elif polling:
+            st.rerun()  # full rerun drops the poll timer
+        else:
+            render(current)
+
+    panel()
+
+
+def render_proof(job) -> None:
+    if isinstance(job.error, ValueError):
+        st.error(str(job.error))
+        st.info("Add STABILITY_API_KEY to your Streamlit secrets to use this feature.")
+        return
+    if job.error is not None:
+        st.error(f"❌ Image generation failed: {job.error}")
+        return
+    proof_type = job.meta["proof_type"]
+    st.success(f"✅ Image generated in {job.elapsed:.0f}s!")
+    st.image(job.result, caption=proof_type, use_container_width=True)
+    st.download_button(
+        "📥 Download Proof Image",
+        job.result,
+        file_name=f"{proof_type.lower().replace(' ','_')}_proof.png",
+        mime="image/png",
+        use_container_width=True,
     )
-    sms = call_openai(prompt, max_tokens=60, temperature=0.7)
-    return f"📞 Incoming Call: {relation}", f"📬 {sms}"
 
 
-def generate_apology(tone: str, context: str) -> str:
-    prompt = (
-        f"Write a {tone.lower()} apology message for missing a {context.lower()} obligation. "
-        "Make it sincere and appropriate. Keep it 2-3 sentences."
+def emergency_job(relation: str, context: str, lang_code: str) -> tuple:
+    """Message plus its audio, so nothing slow is left for the script thread."""
+    call_msg, sms_msg = simulate_emergency(relation, context)
+    clean_sms = sms_msg.replace("📬 ", "")
+    audio = None
+    if not clean_sms.startswith("❌"):
+        try:
+            audio = synthesize_speech(clean_sms, lang_code)
+        except Exception:
+            pass
+    return call_msg, sms_msg, audio
+
+
+def render_emergency(job) -> None:
+    if job.error is not None:
+        st.error(f"❌ API error: {job.error}")
+        return
+    call_msg, sms_msg, audio = job.result
+    st.markdown(
+        f'<div class="result-card" style="border-left-color:#f7b6d2;background:linear-gradient(135deg,#fff0f8,#fff8f0);">'
+        f"<b>{call_msg}</b></div>",
+        unsafe_allow_html=True,
+    )
+    st.markdown(
+        f'<div class="result-card" style="border-left-color:#b6dff7;">{sms_msg}</div>',
+        unsafe_allow_html=True,
     )
-    return call_openai(prompt, max_tokens=200)
-
-
-def craft_image_prompt(proof_type: str, name: str, reason: str) -> str:
-    note = "High quality, realistic, professional. All text clearly readable in English."
-    prompts = {
-        "Hospital Certificate": (
-            f"Professional medical certificate, hospital letterhead, "
-            f"patient name '{name}', diagnosis '{reason}', doctor signature, "
-            f"hospital stamp, current date. Realistic official document layout. {note}"
-        ),
-        "WhatsApp Chat": (
-            f"WhatsApp conversation screenshot. Boss: 'Why aren't you at work today?' "
-            f"Reply from {name}: 'Sorry sir, {reason}. Will send certificate.' "
-            f"Realistic WhatsApp UI, timestamps, green bubbles. {note}"
-        ),
-        "Location Log": (
-            f"Google Maps timeline screenshot. User {name} at hospital due to {reason}. "
-            f"Red location pin, route, timestamp, realistic phone UI. {note}"
-        ),
-    }
-    return prompts.get(proof_type, f"Realistic {proof_type} document. {note}")
+    if audio:
+        st.audio(audio, format="audio/mp3")
+    elif not sms_msg.startswith("📬 ❌"):
+        st.warning("Audio generation failed.")
 
 
 def smart_suggestion() -> str:
@@ -515,12 +626,6 @@ def smart_suggestion() -> str:
     return "⚡ Technical issues"
 
 
-# ─────────────────────────────────────────
-#  LOAD SAVED FAVORITES ON FIRST RUN
-# ─────────────────────────────────────────
-if not st.session_state.favorites:
-    st.session_state.favorites.extend(load_favorites())
-
 # ─────────────────────────────────────────
 #  HERO BANNER
 # ─────────────────────────────────────────
@@ -540,26 +645,10 @@ st.markdown("""
 # ─────────────────────────────────────────
 #  SIDEBAR
 # ─────────────────────────────────────────
-with st.sidebar:
-    st.markdown("## ⚙️ Settings")
-
-    category = st.selectbox(
-        "📂 Category",
-        ["Work", "School", "Health", "Family", "Transport", "Technology", "Weather"],
-    )
-    scenario = st.selectbox(
-        "🎯 Situation",
-        [
-            "Late to Class", "Missed a Deadline", "Didn't Attend a Meeting",
-            "Family Emergency", "Health Issue", "Can't Make It", "Need Extension",
-        ],
-    )
-    urgency = st.selectbox("⚠️ Urgency", ["Low", "Medium", "High"])
-    language = st.selectbox(
-        "🗣️ Language", ["English", "Hindi", "Tamil", "Telugu", "Spanish"]
-    )
-    auto_save = st.checkbox("📌 Auto-save to favorites")
-
+# Clicks inside the tab fragments don't rerun the sidebar, so these
+# counters catch up on the next full rerun (any settings change) rather
+# than costing one per click.
+def sidebar_stats() -> None:
     st.markdown("---")
     st.markdown("### 📊 Session Stats")
 
@@ -572,7 +661,7 @@ with st.sidebar:
         )
     with col_s2:
         st.markdown(
-            f'<div class="stat-pill">⭐ {len(st.session_state.favorites)}<br>'
+            f'<div class="stat-pill">⭐ {len(get_favorites_store())}<br>'
             '<small>Favorites</small></div>',
             unsafe_allow_html=True,
         )
@@ -586,14 +675,119 @@ with st.sidebar:
     # API status indicator
     st.markdown("---")
     st.markdown("### 🔑 API Status")
-    ok_color = "#52c41a" if openai.api_key else "#ff4d4f"
-    ok_label = "✅ Connected" if openai.api_key else "❌ Missing key"
+    ok_color = "#52c41a" if settings.openrouter_api_key else "#ff4d4f"
+    ok_label = "✅ Connected" if settings.openrouter_api_key else "❌ Missing key"
     st.markdown(
         f'<div style="color:{ok_color};font-weight:700;font-size:.9rem;">'
         f"OpenRouter: {ok_label}</div>",
         unsafe_allow_html=True,
     )
 
+    # Operator view, opt-in: only sessions that open it poll the counters.
+    if st.checkbox("📈 Performance panel", key="show_perf"):
+        perf_panel()
+
+
+@st.fragment(run_every=STATS_REFRESH_SECONDS)
+def perf_panel() -> None:
+    """Process-wide cache, gate and stage counters, refreshed on a timer."""
+    cache_stats = get_response_cache().stats()
+    st.caption(
+        f"⚡ Cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%})"
+    )
+    gate_stats = get_openrouter_gate().stats()
+    st.caption(
+        f"🚦 OpenRouter: {gate_stats['in_flight']} in flight · {gate_stats['queued']} queued · "
+        f"{gate_stats['coalesced']} coalesced · {gate_stats['throttled']} throttled"
+    )
+    route_stats = get_router().stats()
+    st.caption(
+        f"🧭 Routing: {route_stats['hedged']} hedged · {route_stats['backup_wins']} won by backup · "
+        f"{route_stats['failovers']} failovers · {route_stats['timeouts']} timeouts"
+    )
+    tr_stats = get_translation_cache().stats()
+    st.caption(
+        f"🌍 Translations: {tr_stats['hits']} hits · {tr_stats['misses']} misses "
+        f"({tr_stats['hit_rate']:.0%})"
+    )
+    pool_stats = get_warm_pool().stats()
+    st.caption(
+        f"🔥 Warm pool: {pool_stats['ready']} ready · {pool_stats['hits']} served "
+        f"· {pool_stats['refilling']} refilling"
+    )
+    pools = http_transport.pool_stats()
+    st.caption(
+        f"🔌 HTTP: {sum(p['connections'] for p in pools)} connections · "
+        f"{sum(p['requests'] for p in pools)} requests · {len(pools)} hosts"
+    )
+    audio_stats = get_audio_cache().stats()
+    offline = sum(
+        row["wins"] for row in get_tts_router().profile_rows() if row["model"] != "gtts"
+    )
+    st.caption(
+        f"🔊 Audio: {audio_stats['hits']} hits · {audio_stats['misses']} misses "
+        f"({audio_stats['bytes'] / 1e6:.1f} MB) · {offline} offline"
+    )
+
+    # Stage latencies across every session in this process.
+    metrics = get_metrics()
+    rows = metrics.summary()
+    if rows:
+        st.dataframe(
+            [
+                {
+                    "stage": row["stage"],
+                    "calls": row["calls"],
+                    "p50 ms": round(row["p50_ms"]),
+                    "p95 ms": round(row["p95_ms"]),
+                    "hit %": "" if row["hit_rate"] is None else f"{row['hit_rate']:.0%}",
+                    "errors": row["errors"],
+                }
+                for row in rows
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+        for span in metrics.recent_spans(8):
+            flags = " · ".join(filter(None, [span["cache"], span["error"]]))
+            st.caption(f"{span['stage']} {span['ms']:.0f} ms" + (f" · {flags}" if flags else ""))
+    else:
+        st.caption("No stages timed yet.")
+    profiles = get_router().profile_rows() + [
+        dict(row, task=f"tts ({row['task']})") for row in get_tts_router().profile_rows()
+    ]
+    if profiles:
+        st.dataframe(
+            [
+                {
+                    "task": row["task"],
+                    "model": row["model"].split("/")[-1],
+                    "n": row["samples"],
+                    "won": row["wins"],
+                    "p50 ms": None if row["p50_ms"] is None else round(row["p50_ms"]),
+                    "p95 ms": None if row["p95_ms"] is None else round(row["p95_ms"]),
+                    "err %": f"{row['error_rate']:.0%}",
+                }
+                for row in profiles
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+    st.caption(f"Prometheus: `{METRICS_FILE}` · spans: `{METRICS_LOG}`")
+
+
+with st.sidebar:
+    st.markdown("## ⚙️ Settings")
+
+    category = st.selectbox("📂 Category", CATEGORIES)
+    scenario = st.selectbox("🎯 Situation", SCENARIOS)
+    urgency = st.selectbox("⚠️ Urgency", URGENCIES)
+    language = st.selectbox("🗣️ Language", list(LANGUAGE_CODES))
+    auto_save = st.checkbox("📌 Auto-save to favorites")
+
+    sidebar_stats()
+
 # ─────────────────────────────────────────
 #  MAIN TABS
 # ─────────────────────────────────────────
@@ -604,48 +798,166 @@ tab1, tab2, tab3, tab4 = st.tabs(
 # ══════════════════════════════════════════
 #  TAB 1 – Generate Excuse
 # ══════════════════════════════════════════
-with tab1:
+# Each tab's interactive area is a fragment: a click inside it reruns only
+# that fragment, so the CSS, hero banner, sidebar and other tabs are not
+# rebuilt or resent.  Sidebar changes still trigger a full rerun, which
+# passes the new settings in as arguments.
+@st.fragment
+def excuse_tab(category: str, scenario: str, urgency: str, language: str,
+               auto_save: bool) -> None:
     col_gen, col_tip = st.columns([3, 1])
 
     with col_gen:
         st.markdown('<div class="section-title">🎲 Generate Your Excuse</div>', unsafe_allow_html=True)
 
-        if st.button("✨ Generate Excuse", use_container_width=True):
-            if not openai.api_key:
+        combo = (category, scenario, urgency, language)
+        queue = st.session_state.excuse_queue.setdefault(combo, [])
+        btn_gen, btn_next = st.columns([3, 1])
+        with btn_gen:
+            generate = st.button("✨ Generate Excuse", use_container_width=True)
+        with btn_next:
+            # Rendered before this run fills the queue, so it is never disabled;
+            # with nothing queued it generates afresh.
+            next_up = st.button(
+                "⏭️ Next", use_container_width=True, key="next_excuse",
+                help="Show the next-best excuse from the last generation, instantly.",
+            )
+
+        if generate or next_up:
+            if not settings.openrouter_api_key:
                 st.error("❌ OPENROUTER_API_KEY is missing. See the Setup Guide below.")
             else:
-                with st.spinner("🤖 Crafting your perfect excuse..."):
-                    raw = generate_excuse(category, scenario, urgency)
-
-                if raw.startswith("❌"):
-                    st.error(raw)
+                deadline = Deadline(GENERATE_DEADLINE)
+                timings = {}
+                card = st.empty()
+                if next_up and queue:
+                    # Generated and ranked by an earlier click; only translation
+                    # remains, and that was started in the background.
+                    pick, pooled = queue.pop(0), False
                 else:
-                    translated = translate_text(raw, language)
+                    warm_pool = get_warm_pool()
+                    pick, timings["pool"] = timed(warm_pool.take, combo)
+                    warm_pool.refill(combo)
+                    pooled = pick is not None
+
+                if pick is None:
+                    # One request returns EXCUSE_CANDIDATES excuses; the first
+                    # streams in as a preview until the best one is chosen.
+                    card.caption("🤖 Crafting your perfect excuse...")
+                    completion, timings["generate"] = timed(
+                        render_stream,
+                        generate_excuse(
+                            category, scenario, urgency, stream=True, n=EXCUSE_CANDIDATES,
+                            deadline=deadline, language=language,
+                        ),
+                        card,
+                        '<div class="result-card">📝 {text}</div>',
+                        lambda text: (parse_candidates(text) or [""])[0],
+                    )
+                    candidates = [] if completion.startswith("❌") else parse_candidates(completion)
+                    if candidates and language != "English" and excuse_engine.NATIVE_GENERATION:
+                        # Written in the target language, which the local scorer
+                        # can't judge: keep the model's order and rank alongside TTS.
+                        ranked = [{"text": text, "rank": None} for text in candidates]
+                    elif candidates:
+                        ranked, timings["rank"] = timed(
+                            pick_best, candidates, category, scenario, deadline
+                        )
+                    if candidates:
+                        pick, queue[:] = ranked[0], ranked[1:]
+                        for queued in queue:
+                            submit(excuse_engine.ensure_language, queued["text"], language)
+                    else:
+                        card.error(completion or "❌ The model returned no excuse.")
+
+                if pick is not None:
+                    if pooled:
+                        translated = pick["text"]
+                    else:
+                        translated, timings["translate"] = timed(
+                            ensure_language, pick["text"], language, deadline
+                        )
                     st.session_state.last_excuse = translated
-
-                    if translated not in st.session_state.excuse_history:
-                        st.session_state.excuse_history.append(translated)
-                    st.session_state.total_generated += 1
-
-                    st.success("✅ Excuse ready!")
-                    st.markdown(
+                    card.markdown(
                         f'<div class="result-card">📝 {translated}</div>',
                         unsafe_allow_html=True,
                     )
 
-                    # Believability rank
-                    with st.spinner("Checking believability..."):
-                        ranking = ai_rank_excuse(translated)
-                    st.markdown(f"**📊 Believability:** {ranking}")
+                    # TTS only depends on the translated text — start it now and
+                    # fill its slot once everything else is on screen.
+                    tts_future = submit(
+                        timed, synthesize_speech, translated, LANGUAGE_CODES[language]
+                    )
+                    rank_future = None
+                    if pick["rank"] is None:
+                        unranked = [translated] + [q["text"] for q in queue if q["rank"] is None]
+                        rank_future = submit(
+                            timed, rank_excuses, unranked, deadline, category, scenario
+                        )
+
+                    st.session_state.excuse_history.add(translated)
+                    st.session_state.total_generated += 1
+
+                    st.success("✅ Excuse ready!")
+                    rank_slot = st.empty()
+                    rank_slot.markdown(f"**📊 Believability:** {pick['rank'] or '⏳ checking...'}")
+                    if queue:
+                        st.caption(f"⏭️ {len(queue)} more ready — press Next for another.")
 
-                    if auto_save and translated not in st.session_state.favorites:
-                        st.session_state.favorites.append(translated)
-                        save_favorite_to_file(translated)
+                    if auto_save and save_favorite(translated):
                         st.success("⭐ Auto-saved to favorites!")
 
                     # Audio
                     st.markdown('<div class="section-title">🔊 Listen</div>', unsafe_allow_html=True)
-                    speak_text(translated, LANGUAGE_CODES[language])
+                    audio_slot = st.empty()
+                    audio_slot.caption("⏳ Generating audio...")
+                    timing_slot = st.empty()
+                    timing_slot.caption(format_timings(timings))
+                    # Fill each slot as soon as its stage finishes; whatever is
+                    # still running at the deadline degrades.
+                    stages = {tts_future: "tts"}
+                    if rank_future is not None:
+                        stages[rank_future] = "rank"
+                    pending = set(stages)
+                    while pending:
+                        done, pending = wait(
+                            pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED
+                        )
+                        if not done:
+                            break
+                        for future in done:
+                            if stages[future] == "tts":
+                                try:
+                                    audio, timings["tts"] = future.result()
+                                    audio_slot.audio(audio, format="audio/mp3")
+                                except Exception as exc:
+                                    audio_slot.warning(f"Audio generation failed: {exc}")
+                                continue
+                            try:
+                                scores, timings["rank"] = future.result()
+                            except Exception as exc:
+                                rank_slot.markdown(
+                                    f"**📊 Believability:** {DEFAULT_RANK} (ranking failed: {exc})"
+                                )
+                                continue
+                            rank_slot.markdown(
+                                f"**📊 Believability:** {scores.get(translated, DEFAULT_RANK)}"
+                            )
+                            # Queued candidates were ranked in the same call; best first.
+                            for queued in queue:
+                                queued["rank"] = queued["rank"] or scores.get(queued["text"])
+                            by_text = {queued["text"]: queued for queued in queue}
+                            queue[:] = [by_text[t] for t in sort_by_rank(list(by_text), scores)]
+                        timing_slot.caption(format_timings(timings))
+                    for future in pending:
+                        deadline.degrade(stages[future])
+                        if stages[future] == "tts":
+                            # Still synthesising; it lands in the audio cache for next time.
+                            audio_slot.caption("🔇 Audio skipped to answer in time.")
+                        else:
+                            rank_slot.markdown(f"**📊 Believability:** {DEFAULT_RANK}")
+                    timing_slot.caption(format_timings(timings))
+                    show_degraded(deadline)
 
                     # Share options
                     st.markdown('<div class="section-title">📤 Share</div>', unsafe_allow_html=True)
@@ -669,9 +981,7 @@ with tab1:
                         )
                     with sh3:
                         if st.button("⭐ Save Favorite", use_container_width=True):
-                            if translated not in st.session_state.favorites:
-                                st.session_state.favorites.append(translated)
-                                save_favorite_to_file(translated)
+                            if save_favorite(translated):
                                 st.success("Saved!")
                             else:
                                 st.info("Already in favorites!")
@@ -699,7 +1009,9 @@ with tab1:
             
         )
 
-    # ── Apology sub-section ──────────────
+
+@st.fragment
+def apology_section(language: str) -> None:
     st.markdown("---")
     st.markdown('<div class="section-title">😔 Generate Apology Message</div>', unsafe_allow_html=True)
 
@@ -716,21 +1028,32 @@ with tab1:
         gen_apol = st.button("🙏 Generate", use_container_width=True, key="gen_apol")
 
     if gen_apol:
-        with st.spinner("Writing apology..."):
-            apology = generate_apology(apology_tone, apology_ctx)
+        deadline = Deadline(GENERATE_DEADLINE)
+        apology_card = st.empty()
+        apology_card.caption("Writing apology...")
+        apology = render_stream(
+            generate_apology(apology_tone, apology_ctx, stream=True, deadline=deadline),
+            apology_card,
+            '<div class="result-card" style="border-left-color:#f9aad4;">💌 {text}</div>',
+        )
         if apology.startswith("❌"):
-            st.error(apology)
+            apology_card.error(apology)
         else:
-            st.markdown(
-                f'<div class="result-card" style="border-left-color:#f9aad4;">💌 {apology}</div>',
-                unsafe_allow_html=True,
-            )
-            speak_text(apology, LANGUAGE_CODES[language])
+            speak_text(apology, LANGUAGE_CODES[language], deadline)
+            show_degraded(deadline)
+
+
+with tab1:
+    excuse_tab(category, scenario, urgency, language, auto_save)
+
+    # ── Apology sub-section ──────────────
+    apology_section(language)
 
 # ══════════════════════════════════════════
 #  TAB 2 – Proof Generator
 # ══════════════════════════════════════════
-with tab2:
+@st.fragment
+def proof_tab() -> None:
     st.markdown('<div class="section-title">🖼️ Visual Proof Generator</div>', unsafe_allow_html=True)
     pr1, pr2 = st.columns(2)
     with pr1:
@@ -748,35 +1071,19 @@ with tab2:
             st.warning("⚠️ Please fill in both Name and Reason.")
         else:
             prompt = craft_image_prompt(proof_type, proof_name.strip(), proof_reason.strip())
-            with st.spinner("🎨 Generating image — this may take ~30 seconds..."):
-                try:
-                    flux = FluxImageGenerator()
-                    image = flux.generate_image(prompt, width=1024, height=1024)
-
-                    buf = BytesIO()
-                    image.save(buf, format="PNG")
-                    buf.seek(0)
-
-                    st.success("✅ Image generated!")
-                    st.image(buf, caption=proof_type, use_container_width=True)
-                    buf.seek(0)
-                    st.download_button(
-                        "📥 Download Proof Image",
-                        buf,
-                        file_name=f"{proof_type.lower().replace(' ','_')}_proof.png",
-                        mime="image/png",
-                        use_container_width=True,
-                    )
-                except ValueError as exc:
-                    st.error(str(exc))
-                    st.info("Add STABILITY_API_KEY to your Streamlit secrets to use this feature.")
-                except Exception as exc:
-                    st.error(f"❌ Image generation failed: {exc}")
+            start_job("proof", generate_proof_image, prompt, meta={"proof_type": proof_type})
+
+    show_job("proof", "🎨 Generating image — this may take ~30 seconds", render_proof)
+
+
+with tab2:
+    proof_tab()
 
 # ══════════════════════════════════════════
 #  TAB 3 – Emergency Simulator
 # ══════════════════════════════════════════
-with tab3:
+@st.fragment
+def emergency_tab(language: str) -> None:
     st.markdown('<div class="section-title">🚨 Emergency Message Simulator</div>', unsafe_allow_html=True)
     st.markdown("Generate realistic urgent messages from contacts to support your excuse.")
 
@@ -793,40 +1100,64 @@ with tab3:
         )
 
     if st.button("📞 Generate Emergency Message", use_container_width=True):
-        with st.spinner("Creating urgent message..."):
-            call_msg, sms_msg = simulate_emergency(relation, em_context)
+        start_job("emergency", emergency_job, relation, em_context, LANGUAGE_CODES[language])
 
-        st.markdown(
-            f'<div class="result-card" style="border-left-color:#f7b6d2;background:linear-gradient(135deg,#fff0f8,#fff8f0);">'
-            f"<b>{call_msg}</b></div>",
-            unsafe_allow_html=True,
-        )
-        st.markdown(
-            f'<div class="result-card" style="border-left-color:#b6dff7;">{sms_msg}</div>',
-            unsafe_allow_html=True,
-        )
+    show_job("emergency", "📞 Creating urgent message", render_emergency)
 
-        clean_sms = sms_msg.replace("📬 ", "")
-        if not clean_sms.startswith("❌"):
-            speak_text(clean_sms, LANGUAGE_CODES[language])
+
+with tab3:
+    emergency_tab(language)
 
 # ══════════════════════════════════════════
 #  TAB 4 – History & Favorites
 # ══════════════════════════════════════════
-with tab4:
+@st.fragment
+def history_tab(language: str) -> None:
+    rk1, rk2, rk3, rk4 = st.columns([3, 1, 1, 1])
+    with rk1:
+        sort_mode = st.radio(
+            "Sort by", ["🕒 Newest", "📊 Most believable"], horizontal=True, key="hist_sort"
+        )
+    with rk2:
+        page_size = st.selectbox("Per page", PAGE_SIZES, index=1, key="page_size")
+    with rk3:
+        st.write("")
+        if st.button("📊 Rank all", use_container_width=True, key="rank_all"):
+            with st.spinner("Ranking history & favorites..."):
+                rank_excuses([*st.session_state.excuse_history, *get_favorites_store().all()])
+    with rk4:
+        st.write("")
+        # Other tabs' fragments don't rerun this one; pick up their new entries.
+        st.button("🔄 Refresh", use_container_width=True, key="hist_refresh")
+
+    by_rank = sort_mode == "📊 Most believable"
+    scores = cached_rankings(st.session_state.excuse_history)
+
+    def ordered(entries: list) -> list:
+        newest = list(reversed(entries))
+        return sort_by_rank(newest, scores) if by_rank else newest
+
     h_col, f_col = st.columns(2)
 
     with h_col:
         st.markdown('<div class="section-title">📜 Excuse History</div>', unsafe_allow_html=True)
 
         if st.session_state.excuse_history:
-            for i, exc in enumerate(reversed(st.session_state.excuse_history), 1):
-                with st.expander(f"Excuse #{i} — {exc[:45]}..."):
+            page, offset = paginate(
+                ordered(st.session_state.excuse_history), "history_page", page_size
+            )
+            if st.session_state.excuse_history.suppressed:
+                st.caption(
+                    f"🧹 {st.session_state.excuse_history.suppressed} near-duplicate(s) skipped"
+                )
+            for i, exc in enumerate(page, offset + 1):
+                badge = scores.get(exc, "")[:1]
+                with st.expander(f"{badge} Excuse #{i} — {exc[:45]}...".strip()):
                     st.write(exc)
+                    if exc in scores:
+                        st.caption(f"📊 {scores[exc]}")
                     if st.button(f"⭐ Save", key=f"sh_{i}"):
-                        if exc not in st.session_state.favorites:
-                            st.session_state.favorites.append(exc)
-                            save_favorite_to_file(exc)
+                        if save_favorite(exc):
                             st.success("Saved!")
             st.download_button(
                 "⬇️ Download All History",
@@ -834,6 +1165,19 @@ with tab4:
                 "excuse_history.txt",
                 use_container_width=True,
             )
+            if language != "English" and st.button(
+                f"🌍 Export History in {language}", use_container_width=True
+            ):
+                with st.spinner(f"Translating history to {language}..."):
+                    exported = translate_batch(
+                        list(st.session_state.excuse_history), language
+                    )
+                st.download_button(
+                    f"⬇️ Download {language} History",
+                    "\n\n---\n\n".join(exported),
+                    f"excuse_history_{LANGUAGE_CODES[language]}.txt",
+                    use_container_width=True,
+                )
             if st.button("🧹 Clear History", use_container_width=True):
                 st.session_state.excuse_history.clear()
                 st.success("Cleared!")
@@ -844,28 +1188,36 @@ with tab4:
     with f_col:
         st.markdown('<div class="section-title">⭐ Favorites</div>', unsafe_allow_html=True)
 
-        if st.session_state.favorites:
-            for i, fav in enumerate(reversed(st.session_state.favorites), 1):
-                with st.expander(f"Fav #{i} — {fav[:45]}..."):
+        store = get_favorites_store()
+        total = len(store)
+        if total:
+            # Only the visible page is read, in either order, and only it is looked up.
+            offset = page_offset(total, "fav_page", page_size)
+            page = store.page(offset, page_size, rank_order=RANK_LABELS if by_rank else None)
+            scores.update(cached_rankings(page))
+            for i, fav in enumerate(page, offset + 1):
+                badge = scores.get(fav, "")[:1]
+                with st.expander(f"{badge} Fav #{i} — {fav[:45]}...".strip()):
                     st.write(fav)
+                    if fav in scores:
+                        st.caption(f"📊 {scores[fav]}")
 
-            if len(st.session_state.favorites) > 1:
+            if total > 1:
                 st.markdown("**🏆 Most Saved**")
-                for rank, (exc, cnt) in enumerate(
-                    Counter(st.session_state.favorites).most_common(3), 1
-                ):
+                for rank, exc in enumerate(store.page(0, 3, newest_first=False), 1):
                     st.markdown(f"**{rank}.** {exc[:55]}…")
 
             if st.button("🗑️ Clear Favorites", use_container_width=True):
-                st.session_state.favorites.clear()
-                if os.path.exists(FAV_FILE):
-                    os.remove(FAV_FILE)
+                store.clear()
+                store.compact()
                 st.success("Cleared!")
                 st.rerun()
         else:
             st.info("Tick 'Auto-save' in Settings or hit ⭐ on any excuse!")
 
 
+with tab4:
+    history_tab(language)
 
 # ─────────────────────────────────────────
 #  FOOTER
@@ -0,0 +1,108 @@
+# audio_cache.py
+import os
+import tempfile
+import threading
+import time
+
+from response_cache import LRUCache, make_key
+
+
+class AudioCache:
+    """Content-addressed MP3 cache on disk with a small in-memory front.
+
+    Clips are stored as ``<sha256>.mp3`` under *directory*.  When the
+    directory grows past ``max_bytes`` the least recently used files are
+    deleted: last use is this process's own record of every hit, memory
+    hits included, or the file's mtime (refreshed on disk hits) for clips
+    it hasn't used.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024,
+                 memory_items: int = 64):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory = LRUCache(maxsize=memory_items, ttl=None)
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._used = {}                  # key → time of this process's last hit or put
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def key(text: str, lang_code: str, slow: bool = False) -> str:
+        return make_key(text, lang_code, bool(slow))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp3"):
+                st = entry.stat()
+                yield entry.path, st.st_size, st.st_mtime
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key: str) -> bytes | None:
+        data = self.memory.get(key)
+        if data is not None:
+            self._used[key] = time.time()
+            self._count("memory_hits")
+            return data
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self._count("misses")
+            return None
+        self.memory.set(key, data)
+        self._used[key] = time.time()
+        self._count("disk_hits")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self.memory.set(key, data)
+        self._used[key] = time.time()
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                self._size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        def last_used(entry) -> float:
+            path, _, mtime = entry
+            return max(mtime, self._used.get(os.path.basename(path)[:-4], 0.0))
+
+        for path, size, _ in sorted(self._entries(), key=last_used):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            key = os.path.basename(path)[:-4]
+            self.memory.pop(key)
+            self._used.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["bytes"] = self._size
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
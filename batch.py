@@ -0,0 +1,179 @@
+# batch.py
+"""Generate excuses in bulk from a CSV or JSON-lines job file.
+
+Each job has ``category``, ``scenario``, ``urgency`` and optionally
+``language`` (default English) and ``id`` (default: its row number).
+Results are appended to the output as JSON lines as soon as each job
+finishes, so a run can be stopped at any time and restarted: jobs whose
+id already has an ``"ok"`` line in the output are skipped.
+
+    python batch.py jobs.csv -o results.jsonl --concurrency 8
+    python batch.py jobs.jsonl -o results.jsonl --rps 4 --seed-warm-pool
+    python batch.py jobs.csv -o results.jsonl --deadline 5    # "degraded" lists cut stages
+
+The OpenRouter rate limit and response caches are the same ones the app
+uses, so a batch run can pre-seed content for it.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import excuse_engine
+from deadline import Deadline
+
+FIELDS = ("category", "scenario", "urgency")
+PROGRESS_EVERY = 25              # jobs between progress lines on stderr
+
+
+def read_jobs(path: str):
+    """Yield job dicts lazily from a ``.csv`` or JSON-lines file."""
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(fh)
+        else:
+            rows = (json.loads(line) for line in fh if line.strip())
+        for number, row in enumerate(rows, 1):
+            missing = [field for field in FIELDS if not row.get(field)]
+            if missing:
+                raise ValueError(f"{path}: job {number} is missing {', '.join(missing)}")
+            job = {field: row[field].strip() for field in FIELDS}
+            job["language"] = (row.get("language") or "English").strip()
+            job["id"] = str(row.get("id") or number)
+            yield job
+
+
+def completed_ids(path: str) -> set:
+    """Ids that already succeeded in an earlier run's output."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue             # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def _end_last_line(path: str) -> None:
+    """Terminate a line left unfinished by an interrupted run."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as fh:
+        if fh.seek(0, os.SEEK_END):
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                fh.write(b"\n")
+
+
+def run_job(job: dict, budget: float | None = None) -> dict:
+    record = dict(job)
+    start = time.perf_counter()
+    try:
+        if job["language"] not in excuse_engine.LANGUAGE_CODES:
+            raise ValueError(f"unsupported language: {job['language']}")
+        record.update(excuse_engine.make_excuse(
+            job["category"], job["scenario"], job["urgency"], job["language"],
+            Deadline(budget) if budget else None,
+        ))
+        record["status"] = "ok"
+    except Exception as exc:
+        record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+def run(jobs, out, concurrency: int, on_result=None, budget: float | None = None) -> dict:
+    """Run *jobs* with at most *concurrency* in flight, writing each result
+    to *out* as it completes.  Returns ``{"ok": n, "error": n}``."""
+    counts = {"ok": 0, "error": 0}
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        pending = set()
+
+        def drain() -> None:
+            nonlocal pending
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+                if on_result is not None:
+                    on_result(record)
+                finished = counts["ok"] + counts["error"]
+                if finished % PROGRESS_EVERY == 0:
+                    rate = finished / max(time.monotonic() - started, 1e-9)
+                    print(f"{finished} done ({counts['error']} failed), {rate:.1f}/s",
+                          file=sys.stderr)
+
+        # Keep the job file streaming: only ``concurrency`` jobs are read ahead.
+        for job in jobs:
+            while len(pending) >= concurrency:
+                drain()
+            pending.add(pool.submit(run_job, job, budget))
+        while pending:
+            drain()
+    return counts
+
+
+def _warm_pool_seeder():
+    """A result callback that stores successful results in the app's warm pool."""
+    from warm_pool import WarmPool
+
+    pool = WarmPool(excuse_engine.CACHE_DB, producer=None, submit=None)
+
+    def seed(record: dict) -> None:
+        if record["status"] == "ok":
+            combo = tuple(record[field] for field in (*FIELDS, "language"))
+            pool.put(combo, {"text": record["text"], "rank": record["rank"]})
+
+    return seed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("jobs", help="CSV or JSON-lines job file")
+    parser.add_argument("-o", "--output", required=True, help="JSON-lines results file")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs in flight at once")
+    parser.add_argument("--rps", type=float,
+                        help=f"OpenRouter requests/second (default {excuse_engine.OPENROUTER_RPS})")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="time budget per job; translation and ranking are cut past it")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="overwrite the output instead of skipping finished jobs")
+    parser.add_argument("--seed-warm-pool", action="store_true",
+                        help="also add each result to the app's warm pool")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.rps:
+        excuse_engine.OPENROUTER_RPS = args.rps
+    if not excuse_engine.settings.openrouter_api_key:
+        print("OPENROUTER_API_KEY is missing.", file=sys.stderr)
+        return 2
+
+    skip = set() if args.no_resume else completed_ids(args.output)
+    if skip:
+        print(f"Resuming: {len(skip)} job(s) already done.", file=sys.stderr)
+    jobs = (job for job in read_jobs(args.jobs) if job["id"] not in skip)
+
+    on_result = _warm_pool_seeder() if args.seed_warm_pool else None
+
+    if not args.no_resume:
+        _end_last_line(args.output)
+    with open(args.output, "w" if args.no_resume else "a", encoding="utf-8") as out:
+        counts = run(jobs, out, args.concurrency, on_result, args.deadline)
+    print(f"{counts['ok']} ok, {counts['error']} failed → {args.output}", file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
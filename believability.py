@@ -0,0 +1,154 @@
+# believability.py
+"""Offline believability scorer used as a fast path before the LLM ranker.
+
+``score_excuse`` looks at length, sentence shape, mundane vs. far-fetched
+vocabulary and whether the text matches the chosen category/scenario.
+It returns one of ``RANK_LABELS`` plus a confidence in [0, 1]; callers
+escalate to the LLM when the confidence is below their threshold.
+
+Run ``python believability.py [excuse_cache.db]`` to compare the scorer
+against the LLM labels collected in the cache and pick a threshold.
+"""
+import json
+import re
+import sqlite3
+import sys
+
+RANK_LABELS = ("🟢 Highly Believable", "🟡 Somewhat Believable", "🔴 Less Believable")
+
+# Score boundaries: >= HIGH is green, <= LOW is red, anything between is yellow.
+HIGH = 0.45
+LOW = -0.1
+
+_WORD = re.compile(r"[a-z']+")
+_SENTENCE = re.compile(r"[.!?]+(?:\s|$)")
+
+IMPLAUSIBLE = {
+    "alien", "aliens", "zombie", "zombies", "ghost", "dragon", "kidnapped",
+    "abducted", "lottery", "superhero", "meteor", "volcano", "spy", "ufo",
+    "vampire", "robbed", "hostage", "explosion", "jail", "arrested",
+}
+DRAMATIC = {"literally", "unbelievable", "insane", "catastrophic", "died", "never", "worst"}
+MUNDANE = {
+    "traffic", "bus", "train", "metro", "fever", "doctor", "appointment", "tire",
+    "tyre", "outage", "internet", "wifi", "laptop", "meeting", "sick", "cold",
+    "flu", "dentist", "delayed", "delay", "family", "migraine", "stomach",
+    "power", "alarm", "babysitter", "clinic", "pharmacy", "prescription",
+}
+ACCOUNTABLE = {"sorry", "apologize", "apologise", "apologies", "understand", "catch", "update", "send"}
+
+CATEGORY_WORDS = {
+    "Work": {"work", "office", "boss", "manager", "meeting", "client", "shift", "project", "team"},
+    "School": {"class", "school", "college", "lecture", "professor", "teacher", "assignment", "exam"},
+    "Health": {"sick", "fever", "doctor", "clinic", "migraine", "flu", "stomach", "health", "medicine"},
+    "Family": {"family", "mother", "mom", "father", "dad", "brother", "sister", "grandmother", "child"},
+    "Transport": {"traffic", "bus", "train", "metro", "car", "tire", "tyre", "cab", "taxi", "road"},
+    "Technology": {"laptop", "internet", "wifi", "computer", "phone", "power", "outage", "update", "system"},
+    "Weather": {"rain", "storm", "flood", "snow", "weather", "flooded", "waterlogging", "heat", "fog"},
+}
+SCENARIO_WORDS = {
+    "Late to Class": {"late", "class", "delayed", "arrive", "reach"},
+    "Missed a Deadline": {"deadline", "submit", "submission", "extension", "finish", "delay"},
+    "Didn't Attend a Meeting": {"meeting", "attend", "join", "call", "missed"},
+    "Family Emergency": {"family", "emergency", "hospital", "urgent"},
+    "Health Issue": {"sick", "health", "doctor", "fever", "unwell", "ill"},
+    "Can't Make It": {"make", "come", "attend", "unable", "reach"},
+    "Need Extension": {"extension", "extra", "time", "deadline", "more"},
+}
+
+
+def score_excuse(text: str, category: str | None = None,
+                 scenario: str | None = None) -> tuple:
+    """Return ``(label, confidence)`` for *text* without any network call."""
+    if not text:
+        return RANK_LABELS[2], 0.0
+    letters = [c for c in text if c.isalpha()]
+    if not letters or sum(c.isascii() for c in letters) / len(letters) < 0.7:
+        # Lexical features are English-only; defer non-English text.
+        return RANK_LABELS[1], 0.0
+
+    words = _WORD.findall(text.lower())
+    vocab = set(words)
+    n_words = len(words)
+    n_sentences = max(1, len(_SENTENCE.findall(text)))
+
+    score = 0.0
+    if n_words < 8:
+        score -= 0.4
+    elif 15 <= n_words <= 90:
+        score += 0.2
+    elif n_words > 120:
+        score -= 0.2
+    score += 0.1 if n_sentences <= 4 else -0.2
+
+    score -= 0.5 * len(vocab & IMPLAUSIBLE)
+    score -= 0.15 * len(vocab & DRAMATIC)
+    score -= 0.1 * max(0, text.count("!") - 1)
+    score += min(0.4, 0.1 * len(vocab & MUNDANE))
+    score += 0.1 * bool(re.search(r"\d", text))
+    score += min(0.2, 0.1 * len(vocab & ACCOUNTABLE))
+
+    if category in CATEGORY_WORDS:
+        score += 0.2 if vocab & CATEGORY_WORDS[category] else -0.1
+    if scenario in SCENARIO_WORDS:
+        score += 0.1 if vocab & SCENARIO_WORDS[scenario] else -0.05
+
+    if score >= HIGH:
+        label, margin = RANK_LABELS[0], score - HIGH
+    elif score <= LOW:
+        label, margin = RANK_LABELS[2], LOW - score
+    else:
+        label, margin = RANK_LABELS[1], min(score - LOW, HIGH - score)
+    return label, round(min(1.0, 0.5 + margin), 3)
+
+
+def agreement_report(samples, thresholds=(0.5, 0.6, 0.7, 0.8, 0.9)) -> list:
+    """Compare the scorer with LLM labels at several confidence thresholds.
+
+    *samples* is an iterable of ``(text, llm_label, category, scenario)``
+    tuples, scored with the same context the app ranks with.  For each
+    threshold the report gives the share of excuses the scorer would keep
+    locally (``coverage``), its agreement with the LLM on those, and the
+    overall agreement once low-confidence cases are escalated.
+    """
+    scored = [
+        (score_excuse(text, category, scenario), llm)
+        for text, llm, category, scenario in samples
+    ]
+    report = []
+    for threshold in thresholds:
+        local = [(label, llm) for (label, conf), llm in scored if conf >= threshold]
+        agree = sum(label == llm for label, llm in local)
+        report.append({
+            "threshold": threshold,
+            "samples": len(scored),
+            "coverage": len(local) / len(scored) if scored else 0.0,
+            "local_agreement": agree / len(local) if local else 0.0,
+            "overall_agreement": (agree + len(scored) - len(local)) / len(scored) if scored else 0.0,
+        })
+    return report
+
+
+def load_samples(db_path: str, table: str = "rank_samples") -> list:
+    """Read ``(text, llm_label, category, scenario)`` tuples recorded by the
+    app's ranker; samples stored without context get None for both."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT value FROM {table}").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return [tuple((json.loads(value) + [None, None])[:4]) for (value,) in rows]
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "excuse_cache.db"
+    samples = load_samples(path)
+    print(f"{len(samples)} LLM-labelled excuses in {path}")
+    print(f"{'threshold':>9}  {'coverage':>8}  {'local':>6}  {'overall':>7}")
+    for row in agreement_report(samples):
+        print(
+            f"{row['threshold']:>9.2f}  {row['coverage']:>8.1%}  "
+            f"{row['local_agreement']:>6.1%}  {row['overall_agreement']:>7.1%}"
+        )
@@ -0,0 +1,92 @@
+# benchmarks/importtime.py
+"""Measure what importing app.py's dependencies costs at cold start.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter
+and sums the cumulative time per top-level package.  Every module row is
+timed in its own interpreter, so shared dependencies (requests, ...) count
+in each row that pulls them in; the total imports all of them in one
+interpreter, as a cold start does, so each dependency counts once.
+
+    python benchmarks/importtime.py                 # the modules app.py imports eagerly
+    python benchmarks/importtime.py openai gtts     # any modules
+"""
+import ast
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py imports on first use of a feature; eager_modules() finds the rest.
+LAZY = ["openai", "gtts", "deep_translator", "PIL.Image", "flux_ai"]
+
+
+def _top_level_imports(path: str) -> list:
+    """Top-level package names imported at module level in *path*, in order."""
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read(), path)
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name.split(".")[0] for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module.split(".")[0])
+    return list(dict.fromkeys(names))
+
+
+def _is_local(name: str) -> bool:
+    return os.path.exists(os.path.join(ROOT, f"{name}.py"))
+
+
+def eager_modules(entry: str = "app.py") -> list:
+    """Third-party packages *entry* imports at module level, plus every local
+    module loaded at cold start (followed through the local modules)."""
+    modules = [name for name in _top_level_imports(os.path.join(ROOT, entry))
+               if name not in sys.stdlib_module_names]
+    for name in modules:                 # grows as local imports are found
+        if _is_local(name):
+            modules += [dep for dep in _top_level_imports(os.path.join(ROOT, f"{name}.py"))
+                        if _is_local(dep) and dep not in modules]
+    return modules
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time (ms) per top-level package for one fresh import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    totals = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative = cumulative.strip()
+        # Nested imports are indented; only top-level entries carry their
+        # children's time, so summing those avoids double counting.
+        if not cumulative.isdigit() or name[1:2] == " ":
+            continue
+        totals[name.strip().split(".")[0]] += int(cumulative) / 1000
+    return dict(totals)
+
+
+def report(modules) -> None:
+    print(f"{'module':<20}{'ms':>10}")
+    for module in modules:
+        ms = import_times(module).get(module.split(".")[0], 0.0)
+        print(f"{module:<20}{ms:>10.1f}")
+    total = sum(import_times(", ".join(modules)).values())
+    print(f"{'total':<20}{total:>10.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        report(sys.argv[1:])
+    else:
+        print("Eager (every cold start):")
+        report(eager_modules())
+        print("\nLazy (first use only):")
+        report(LAZY)
@@ -0,0 +1,218 @@
+# benchmarks/mock_upstream.py
+"""Local stand-ins for OpenRouter, Google Translate, gTTS and Stability.
+
+One threaded HTTP server answers all four APIs from recorded responses in
+``fixtures.json``, with a configurable delay and error rate per upstream:
+
+    server = MockUpstream(latency={"llm": 0.4}, error_rate={"tts": 0.05})
+    server.start()
+    server.route_session(http_transport.get_session())
+
+An ``"llm:<model>"`` latency key slows down one model only.  Excuses
+asked for in another language come from that language's ``native``
+fixtures, except for an ``off_language`` share answered in English.
+``route_session`` mounts an adapter on the shared HTTP session that sends
+every https:// request to the mock instead, so the app runs unmodified.
+"""
+import base64
+import io
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests.adapters import HTTPAdapter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures.json")
+
+# Seconds added before each response: (mean, jitter), jitter uniform ±.
+DEFAULT_LATENCY = {"llm": (0.35, 0.15), "translate": (0.12, 0.05),
+                   "tts": (0.18, 0.06), "image": (1.5, 0.3)}
+
+
+def _png() -> str:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), (255, 240, 248)).save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+class MockUpstream:
+    """Serves every external API the app calls from one local port."""
+
+    def __init__(self, latency: dict | None = None, error_rate: dict | None = None,
+                 fixtures: str = FIXTURES, seed: int = 0, off_language: float = 0.0):
+        self.latency = dict(DEFAULT_LATENCY)
+        for upstream, value in (latency or {}).items():
+            self.latency[upstream] = value if isinstance(value, tuple) else (value, 0.0)
+        self.error_rate = dict(error_rate or {})
+        self.off_language = off_language
+        with open(fixtures, encoding="utf-8") as fh:
+            self.fixtures = json.load(fh)
+        self.png = _png()
+        self.counters = {name: 0 for name in DEFAULT_LATENCY}
+        self.counters["errors"] = 0
+        self._random = random.Random(seed)
+        self._cycle = {kind: itertools.cycle(texts)
+                       for kind, texts in self.fixtures["completions"].items()}
+        self._cycle.update((language, itertools.cycle(texts))
+                           for language, texts in self.fixtures["native"].items())
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ── lifecycle ───────────────────────────
+    def start(self) -> "MockUpstream":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"    # keep-alive, like the real APIs
+
+            def do_GET(self):
+                mock._handle(self)
+
+            def do_POST(self):
+                mock._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def route_session(self, session) -> None:
+        """Send all of *session*'s https:// traffic to this server."""
+        session.mount("https://", _RedirectAdapter(self.url, session.get_adapter("https://")))
+
+    # ── request handling ────────────────────
+    def _next(self, kind: str) -> str:
+        with self._lock:
+            return next(self._cycle[kind])
+
+    def _handle(self, handler) -> None:
+        path = urllib.parse.urlsplit(handler.path).path
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        if path.endswith("/chat/completions"):
+            upstream = "llm"
+        elif path.endswith("/batchexecute"):
+            upstream = "tts"
+        elif path.endswith("/text-to-image"):
+            upstream = "image"
+        elif path == "/m":
+            upstream = "translate"
+        else:
+            return self._send(handler, 404, b"not found", "text/plain")
+
+        mean, jitter = self.latency[upstream]
+        if upstream == "llm":
+            # "llm:<model>" overrides the delay for one model, to exercise hedging.
+            model = json.loads(body or b"{}").get("model", "")
+            mean, jitter = self.latency.get(f"llm:{model}", (mean, jitter))
+        with self._lock:
+            self.counters[upstream] += 1
+            delay = max(0.0, mean + self._random.uniform(-jitter, jitter))
+            failed = self._random.random() < self.error_rate.get(upstream, 0.0)
+            if failed:
+                self.counters["errors"] += 1
+        time.sleep(delay)
+        if failed:
+            return self._send(handler, 503, b'{"error": "injected"}', "application/json")
+        getattr(self, f"_{upstream}")(handler, body)
+
+    def _send(self, handler, status: int, payload: bytes, content_type: str) -> None:
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _llm(self, handler, body: bytes) -> None:
+        request = json.loads(body or b"{}")
+        prompt = request.get("messages", [{}])[0].get("content", "")
+        text = self._completion(prompt)
+        if not request.get("stream"):
+            payload = {"id": "mock", "object": "chat.completion",
+                       "choices": [{"index": 0, "finish_reason": "stop",
+                                    "message": {"role": "assistant", "content": text}}]}
+            return self._send(handler, 200, json.dumps(payload).encode(), "application/json")
+        # Server-sent events, one word per chunk like the real API.
+        chunks = [f"{word} " for word in text.split(" ")]
+        events = [json.dumps({"choices": [{"index": 0, "delta": {"content": c}}]}) for c in chunks]
+        stream = "".join(f"data: {e}\n\n" for e in events) + "data: [DONE]\n\n"
+        self._send(handler, 200, stream.encode(), "text/event-stream")
+
+    def _completion(self, prompt: str) -> str:
+        if prompt.startswith("Evaluate each"):
+            count = sum(1 for line in prompt.splitlines() if line[:1].isdigit())
+            return "\n".join(f"{i}. {self._next('rank')}" for i in range(1, count + 1))
+        if prompt.startswith("Evaluate"):
+            return self._next("rank")
+        if "urgent text message" in prompt:
+            return self._next("emergency")
+        if "apology" in prompt:
+            return self._next("apology")
+        language = re.search(r"Write (?:it|them all) in (\w+)", prompt)
+        kind = "excuse"
+        if language and language.group(1) in self._cycle:
+            with self._lock:
+                native = self._random.random() >= self.off_language
+            kind = language.group(1) if native else kind
+        many = re.match(r"Write (\d+) different", prompt)
+        if many:
+            return "\n".join(f"{i}. {self._next(kind)}" for i in range(1, int(many.group(1)) + 1))
+        return self._next(kind)
+
+    def _translate(self, handler, body: bytes) -> None:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(handler.path).query)
+        text = query.get("q", [""])[0]
+        target = query.get("tl", ["en"])[0]
+        html = self.fixtures["translate_page"].format(text=f"[{target}] {text}")
+        self._send(handler, 200, html.encode(), "text/html; charset=utf-8")
+
+    def _tts(self, handler, body: bytes) -> None:
+        payload = self.fixtures["tts_response"].replace("{audio}", self.fixtures["tts_audio"])
+        self._send(handler, 200, payload.encode(), "application/json+protobuf")
+
+    def _image(self, handler, body: bytes) -> None:
+        payload = {"artifacts": [{"base64": self.png, "finishReason": "SUCCESS"}]}
+        self._send(handler, 200, json.dumps(payload).encode(), "application/json")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """Rewrites scheme and host to the mock, keeping path and query."""
+
+    def __init__(self, base_url: str, inner: HTTPAdapter):
+        super().__init__()
+        self.base = urllib.parse.urlsplit(base_url)
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        parts = urllib.parse.urlsplit(request.url)
+        request.url = urllib.parse.urlunsplit(
+            (self.base.scheme, self.base.netloc, parts.path, parts.query, parts.fragment)
+        )
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
@@ -0,0 +1,163 @@
+# benchmarks/multilingual.py
+"""Compare translate-after-generate with single-pass native generation.
+
+For each language, ``make_excuse`` runs over distinct combos twice: once
+with the excuse generated in English and translated (``translate``), once
+asking the model to write in the language directly and translating only
+when the local language check fails (``native``).  Each (mode, language)
+runs in its own process with fresh caches.
+
+    python benchmarks/multilingual.py                       # mock upstreams
+    python benchmarks/multilingual.py --off-language 0.2    # model ignores the language 20% of the time
+    python benchmarks/multilingual.py --live --jobs 10      # real OpenRouter / Google Translate
+
+Reported per run: end-to-end p50/p95, upstream LLM and translate calls
+per excuse, the share of final texts that pass the language check, the
+share that needed a translation, and the believability labels.  The mock
+translator only tags the English text with the target code, so compare
+language-check quality with ``--live``.
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+LANGUAGES = ["Hindi", "Tamil", "Telugu", "Spanish"]
+MODES = ["translate", "native"]
+CATEGORIES = ["Work", "School", "Health", "Family", "Transport"]
+SCENARIOS = ["Late to Class", "Missed a Deadline", "Didn't Attend a Meeting", "Need Extension"]
+URGENCIES = ["Low", "Medium", "High"]
+
+
+def run_language(mode: str, language: str, jobs: int, live: bool,
+                 latency: dict, off_language: float, seed: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix=f"bench-{mode}-{language}-")
+    os.chdir(workdir)
+    if not live:
+        os.environ["OPENROUTER_API_KEY"] = "sk-or-bench"
+    sys.path[:0] = [ROOT, HERE]
+    import excuse_engine
+    import http_transport
+    from language_check import is_language
+    from run import summarize
+
+    excuse_engine.NATIVE_GENERATION = mode == "native"
+    server = None
+    if not live:
+        from mock_upstream import MockUpstream
+
+        server = MockUpstream(latency=latency, off_language=off_language, seed=seed).start()
+        server.route_session(http_transport.get_session())
+
+    code = excuse_engine.LANGUAGE_CODES[language]
+    combos = itertools.islice(itertools.product(CATEGORIES, SCENARIOS, URGENCIES), jobs)
+    latencies, in_language, ranks, failures = [], 0, Counter(), []
+    for category, scenario, urgency in combos:
+        start = time.perf_counter()
+        try:
+            result = excuse_engine.make_excuse(category, scenario, urgency, language)
+        except Exception as exc:
+            failures.append(f"{category}/{scenario}/{urgency}: {exc!r}")
+            continue
+        latencies.append(time.perf_counter() - start)
+        in_language += is_language(result["text"], code)
+        ranks[result["rank"]] += 1
+
+    histograms = excuse_engine.get_metrics().histograms
+    done = max(len(latencies), 1)
+    if server is not None:
+        server.stop()
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "mode": mode,
+        "language": language,
+        "jobs": len(latencies),
+        "latency": summarize(latencies),
+        "llm_per_job": histograms["llm"].count / done,
+        "translate_per_job": histograms["translate"].count / done,
+        "in_language": in_language / done,
+        "fallback_rate": histograms["translate"].count / done if mode == "native" else None,
+        "ranks": dict(ranks),
+        "failures": failures,
+    }
+
+
+def spawn(mode: str, language: str, args) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, language,
+               "--jobs", str(args.jobs), "--off-language", str(args.off_language),
+               "--seed", str(args.seed)]
+    for value in args.latency:
+        command += ["--latency", value]
+    if args.live:
+        command.append("--live")
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{mode}/{language} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_report(results: list) -> None:
+    print(f"{'language':<9}{'mode':<11}{'n':>4}{'p50':>9}{'p95':>9}{'llm/job':>9}"
+          f"{'tr/job':>8}{'in lang':>9}{'fallback':>10}  ranks")
+    for result in results:
+        fallback = result["fallback_rate"]
+        ranks = ", ".join(f"{label} {n}" for label, n in sorted(result["ranks"].items()))
+        print(f"{result['language']:<9}{result['mode']:<11}{result['jobs']:>4}"
+              f"{result['latency']['p50'] * 1000:>7.0f}ms{result['latency']['p95'] * 1000:>7.0f}ms"
+              f"{result['llm_per_job']:>9.2f}{result['translate_per_job']:>8.2f}"
+              f"{result['in_language']:>9.0%}{'-' if fallback is None else f'{fallback:.0%}':>10}"
+              f"  {ranks}")
+        for failure in result["failures"]:
+            print(f"  ! {failure}")
+
+
+def main(argv=None) -> int:
+    from run import _pairs
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("languages", nargs="*", metavar="LANGUAGE",
+                        help=f"any of {', '.join(LANGUAGES)} (default: all)")
+    parser.add_argument("--jobs", type=int, default=20, help="excuses per language and mode")
+    parser.add_argument("--latency", action="append", default=[], metavar="UPSTREAM=SECONDS",
+                        help="mock delay for llm or translate")
+    parser.add_argument("--off-language", type=float, default=0.0, metavar="RATE",
+                        help="share of mock native answers that come back in English")
+    parser.add_argument("--live", action="store_true",
+                        help="call the real APIs (needs OPENROUTER_API_KEY)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results here")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = set(args.languages) - set(LANGUAGES)
+    if unknown:
+        parser.error(f"unknown language(s): {', '.join(sorted(unknown))}")
+
+    if args.child:
+        result = run_language(*args.child, args.jobs, args.live, _pairs(args.latency),
+                              args.off_language, args.seed)
+        print(json.dumps(result))
+        return 0
+
+    results = [spawn(mode, language, args)
+               for language in args.languages or LANGUAGES for mode in MODES]
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2, ensure_ascii=False)
+            fh.write("\n")
+    return 1 if any(result["failures"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, HERE)
+    sys.exit(main())
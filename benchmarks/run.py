@@ -0,0 +1,317 @@
+# benchmarks/run.py
+"""Offline performance benchmark for the app.
+
+Every external API is served by ``mock_upstream.MockUpstream``; the real
+app runs under Streamlit's AppTest with N concurrent simulated sessions.
+Each scenario runs in its own process (fresh caches, own peak RSS) from a
+throwaway working directory.
+
+    python benchmarks/run.py                               # all scenarios
+    python benchmarks/run.py generate history --sessions 8 --iterations 10
+    python benchmarks/run.py --latency llm=0.8 --errors tts=0.05
+    python benchmarks/run.py --latency llm:mistralai/mixtral-8x7b-instruct=6   # hedging
+    python benchmarks/run.py generate --openrouter-rps 2   # with the app's own rate limit
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --compare benchmarks/baseline.json --tolerance 0.25
+
+Exits with status 1 if a session failed or, with ``--compare``, if any
+step's p95 grew or a scenario's throughput shrank by more than the
+tolerance.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+APP = os.path.join(ROOT, "app.py")
+
+SECRETS = 'OPENROUTER_API_KEY = "sk-or-bench"\nSTABILITY_API_KEY = "sk-bench"\n'
+# The mock has no quota, so by default the app's client-side OpenRouter
+# rate limit is lifted: with it, N sessions clicking back to back measure
+# the token bucket (and the generate deadline) rather than the app.
+UNTHROTTLED_RPS = 1000.0
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of *values* (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples, default=0.0),
+    }
+
+
+# ─────────────────────────────────────────
+#  CHILD: one scenario in this process
+# ─────────────────────────────────────────
+def _share_runtime() -> None:
+    """Let several AppTest instances run at once in this process.
+
+    AppTest installs a mock Runtime singleton and patches config for the
+    duration of each run, then resets both — which breaks any other
+    session mid-run.  Keep one mock runtime and the config override in place
+    for the whole process instead.  It also compiles the script afresh on
+    every run, and concurrent ``compile()`` calls trip a CPython 3.11 AST
+    bug; share one script cache, as the real server does.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import (
+        MemoryCacheStorageManager,
+    )
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+
+def run_scenario(name: str, sessions: int, iterations: int, latency: dict,
+                 errors: dict, seed: int, rps: float = UNTHROTTLED_RPS) -> dict:
+    # Streamlit locates .streamlit/secrets.toml relative to the cwd at import.
+    workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as fh:
+        fh.write(SECRETS)
+    os.chdir(workdir)
+
+    sys.path[:0] = [ROOT, HERE]
+    import http_transport
+    from mock_upstream import MockUpstream
+    from scenarios import SCENARIOS, SEED_FAVORITES, sample_excuses, seed_history
+    from streamlit.testing.v1 import AppTest
+
+    _share_runtime()
+    # Only after streamlit: settings read the secrets file at import.
+    import excuse_engine
+
+    excuse_engine.OPENROUTER_RPS = rps           # read when the gate is first built
+
+    server = MockUpstream(latency=latency, error_rate=errors, seed=seed).start()
+    server.route_session(http_transport.get_session())
+
+    if name == "history":
+        from favorites_store import FavoritesStore
+
+        FavoritesStore("favorites.db").add_many(
+            sample_excuses(SEED_FAVORITES, random.Random(seed))
+        )
+
+    scenario = SCENARIOS[name]
+    samples, failures, lock = {}, [], threading.Lock()
+
+    def session(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+
+        def step(label, action):
+            start = time.perf_counter()
+            action()
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.setdefault(label, []).append(elapsed)
+
+        try:
+            at = AppTest.from_file(APP, default_timeout=120)
+            if name == "history":
+                from dedup import ExcuseSet
+
+                seed_history(at, rng, ExcuseSet)
+            step("load", at.run)
+            for _ in range(iterations):
+                scenario(at, step, rng)
+        except Exception as exc:
+            with lock:
+                failures.append(f"session {index}: {exc!r}")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    server.stop()
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    interactions = sum(len(v) for k, v in samples.items() if k != "load")
+    return {
+        "scenario": name,
+        "sessions": sessions,
+        "iterations": iterations,
+        "wall_seconds": wall,
+        "throughput": interactions / wall if wall else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "steps": {label: summarize(values) for label, values in samples.items()},
+        "upstream_calls": server.stats(),
+        "openrouter_rps": rps,
+        "throttled": excuse_engine.get_openrouter_gate().stats()["throttled"],
+        "failures": failures,
+    }
+
+
+# ─────────────────────────────────────────
+#  PARENT: spawn scenarios, report, compare
+# ─────────────────────────────────────────
+def spawn(name: str, args) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", name,
+               "--sessions", str(args.sessions), "--iterations", str(args.iterations),
+               "--seed", str(args.seed), "--openrouter-rps", str(args.openrouter_rps)]
+    for flag, values in (("--latency", args.latency), ("--errors", args.errors)):
+        for value in values:
+            command += [flag, value]
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{name} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_report(results: list) -> None:
+    print(f"{'scenario':<11}{'step':<11}{'n':>5}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'ops/s':>9}{'RSS MB':>9}")
+    for result in results:
+        first = True
+        for label, stats in result["steps"].items():
+            extra = (f"{result['throughput']:>9.2f}{result['peak_rss_mb']:>9.0f}"
+                     if first else "")
+            print(f"{result['scenario'] if first else '':<11}{label:<11}{stats['count']:>5}"
+                  f"{stats['p50'] * 1000:>8.0f}ms{stats['p95'] * 1000:>7.0f}ms"
+                  f"{stats['p99'] * 1000:>7.0f}ms{extra}")
+            first = False
+        if result.get("throttled"):
+            print(f"  ~ {result['throttled']} OpenRouter calls waited for the rate limit")
+        for failure in result["failures"]:
+            print(f"  ! {failure}")
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of *results* against *baseline*."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result["scenario"])
+        if base is None:
+            continue
+        shape = (result["sessions"], result["iterations"])
+        if shape != (base["sessions"], base["iterations"]):
+            regressions.append(
+                f"{result['scenario']}: not comparable, ran {shape[0]}x{shape[1]} "
+                f"vs baseline {base['sessions']}x{base['iterations']} (sessions x iterations)"
+            )
+            continue
+        base_rps = base.get("openrouter_rps")
+        if base_rps != result["openrouter_rps"]:
+            regressions.append(
+                f"{result['scenario']}: not comparable, ran at --openrouter-rps "
+                f"{result['openrouter_rps']:g} vs baseline {base_rps}"
+            )
+            continue
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result['scenario']}: throughput {result['throughput']:.2f} ops/s "
+                f"(baseline {base['throughput']:.2f})"
+            )
+        for label, stats in result["steps"].items():
+            ref = base["steps"].get(label)
+            if ref and stats["p95"] > ref["p95"] * (1 + tolerance):
+                regressions.append(
+                    f"{result['scenario']}/{label}: p95 {stats['p95'] * 1000:.0f}ms "
+                    f"(baseline {ref['p95'] * 1000:.0f}ms)"
+                )
+    return regressions
+
+
+def _pairs(values: list) -> dict:
+    """``["llm=0.5", ...]`` → ``{"llm": 0.5}``."""
+    parsed = {}
+    for value in values:
+        key, _, number = value.partition("=")
+        parsed[key] = float(number)
+    return parsed
+
+
+def main(argv=None) -> int:
+    from scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=5, help="journeys per session")
+    parser.add_argument("--latency", action="append", default=[], metavar="UPSTREAM=SECONDS",
+                        help="mock delay for llm, llm:<model>, translate, tts or image")
+    parser.add_argument("--errors", action="append", default=[], metavar="UPSTREAM=RATE",
+                        help="fraction of mock responses that fail with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--openrouter-rps", type=float, default=UNTHROTTLED_RPS, metavar="RATE",
+                        help="the app's OpenRouter rate limit (2 in production; "
+                             "default: effectively none, as the mock has no quota)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results here")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.child:
+        result = run_scenario(args.child, args.sessions, args.iterations,
+                              _pairs(args.latency), _pairs(args.errors),
+                              args.seed, args.openrouter_rps)
+        print(json.dumps(result))
+        return 0
+
+    results = [spawn(name, args) for name in args.scenarios or SCENARIOS]
+    print_report(results)
+    by_name = {result["scenario"]: result for result in results}
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(by_name, fh, indent=2)
+            fh.write("\n")
+
+    status = 1 if any(result["failures"] for result in results) else 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.compare}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# benchmarks/scenarios.py
+"""User journeys driven through the real app with Streamlit's AppTest.
+
+Each scenario is ``fn(at, step, rng)``: it performs one iteration of the
+journey on an already-loaded ``AppTest`` and wraps every user-visible
+interaction in ``step(name, action)``, which times it.
+"""
+import time
+
+POLL_SECONDS = 0.05
+JOB_TIMEOUT = 60
+
+SEED_FAVORITES = 1000
+
+
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _click(at, label):
+    _widget(at.button, label).click()
+    at.run()
+
+
+def _wait_for_job(at, pending_label):
+    """Rerun until *pending_label* is gone, as the app's poller would."""
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while any(pending_label in info.value for info in at.info):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"job still pending: {pending_label}")
+        time.sleep(POLL_SECONDS)
+        at.run()
+
+
+def _fail_on_exception(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def generate(at, step, rng):
+    """Pick a combination and language, generate, then take the next queued
+    candidate; covers rank + translate + TTS."""
+    sidebar = at.sidebar.selectbox
+    for label in ("📂 Category", "🎯 Situation", "⚠️ Urgency", "🗣️ Language"):
+        box = _widget(sidebar, label)
+        box.set_value(rng.choice(box.options))
+    step("generate", lambda: _click(at, "✨ Generate Excuse"))
+    step("next", lambda: _click(at, "⏭️ Next"))
+    _fail_on_exception(at)
+
+
+def apology(at, step, rng):
+    _widget(at.selectbox, "Tone").set_value(rng.choice(["Formal", "Emotional", "Casual"]))
+    step("apology", lambda: _click(at, "🙏 Generate"))
+    _fail_on_exception(at)
+
+
+def emergency(at, step, rng):
+    """Start the background job and poll until the message is shown."""
+    _widget(at.selectbox, "👥 Who is contacting you?").set_value(
+        rng.choice(["Mom", "Dad", "Doctor", "Boss"])
+    )
+
+    def run():
+        _click(at, "📞 Generate Emergency Message")
+        _wait_for_job(at, "📞 Creating urgent message")
+
+    step("emergency", run)
+    _fail_on_exception(at)
+
+
+def history(at, step, rng):
+    """Browse a history/favorites list seeded with SEED_FAVORITES entries."""
+    step("rerun", at.run)
+    step("refresh", lambda: _click(at, "🔄 Refresh"))
+    fav_page = at.number_input(key="fav_page")
+    fav_page.set_value(rng.randint(1, int(fav_page.max)))
+    step("page", at.run)
+    at.radio(key="hist_sort").set_value("📊 Most believable")
+    step("sort", at.run)
+    at.radio(key="hist_sort").set_value("🕒 Newest")
+    at.run()
+    _fail_on_exception(at)
+
+
+def seed_history(at, rng, excuse_set):
+    """Fill the session's history before its first run."""
+    history_set = excuse_set(maxlen=200, threshold=0.6)  # HISTORY_MAX, NEAR_DUP_THRESHOLD
+    for text in sample_excuses(SEED_FAVORITES, rng):
+        history_set.add(text)
+    at.session_state["excuse_history"] = history_set
+
+
+def sample_excuses(count, rng):
+    """Distinct, plausible excuses that don't collapse as near-duplicates."""
+    who = ["my bus", "the metro", "my laptop", "my landlord", "my cousin", "the printer",
+           "our dog", "my phone", "the wifi", "my bike", "the elevator", "my neighbour"]
+    what = ["broke down", "flooded", "caught fire", "got stolen", "was recalled",
+            "needed urgent repairs", "ran out of battery", "was quarantined"]
+    when = ["this morning", "at midnight", "during lunch", "right before class",
+            "on the highway", "after the storm", "before my shift"]
+    then = ["so I waited for help", "and I had to sort it out", "so I filed a report",
+            "and nobody else could step in", "so I called the helpline"]
+    texts = []
+    for i in range(count):
+        texts.append(
+            f"Sorry, {rng.choice(who)} {rng.choice(what)} {rng.choice(when)}, "
+            f"{rng.choice(then)} (ref {i:04d})."
+        )
+    return texts
+
+
+SCENARIOS = {
+    "generate": generate,
+    "apology": apology,
+    "emergency": emergency,
+    "history": history,
+}
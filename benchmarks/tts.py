@@ -0,0 +1,151 @@
+# benchmarks/tts.py
+"""Speech latency and throughput per language and TTS backend.
+
+gTTS is answered by ``mock_upstream`` (its delay and error rate come from
+the network condition); espeak-ng runs for real when it is installed.
+``auto`` is the app's default: gTTS first, espeak when gTTS is slow or
+failing.  Backend health is tracked per language, so the first clips of
+each language pay the hedge delay before gTTS is demoted.  Each
+(backend, condition) runs in its own process with a fresh audio cache,
+and every clip is a cache miss.
+
+    python benchmarks/tts.py                                  # every backend, healthy network
+    python benchmarks/tts.py --condition slow --condition failing
+    python benchmarks/tts.py --backend auto --clips 20 --concurrency 8
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+BACKENDS = ["gtts", "espeak", "auto"]
+CONDITIONS = {                   # mock gTTS (latency, error rate)
+    "healthy": ({}, {}),
+    "slow": ({"tts": 6.0}, {}),
+    "failing": ({}, {"tts": 0.5}),
+}
+
+
+def _texts(fixtures: dict) -> dict:
+    """One excuse-length sentence per language code."""
+    texts = {"en": fixtures["completions"]["excuse"][0]}
+    codes = {"Hindi": "hi", "Tamil": "ta", "Telugu": "te", "Spanish": "es"}
+    texts.update((codes[language], native[0]) for language, native in fixtures["native"].items())
+    return texts
+
+
+def run_backend(backend: str, condition: str, clips: int, concurrency: int,
+                seed: int) -> dict:
+    sys.path[:0] = [ROOT, HERE]
+    import excuse_engine
+    import http_transport
+    from mock_upstream import MockUpstream
+    from run import summarize
+
+    result = {"backend": backend, "condition": condition, "languages": {}}
+    if backend != "auto":
+        if backend not in excuse_engine.get_tts_backends():
+            result["skipped"] = f"{backend} is not installed"
+            return result
+        excuse_engine.TTS_BACKENDS = {code: [backend] for code in excuse_engine.TTS_BACKENDS}
+    workdir = tempfile.mkdtemp(prefix=f"bench-tts-{backend}-")
+    os.chdir(workdir)
+
+    latency, errors = CONDITIONS[condition]
+    server = MockUpstream(latency=latency, error_rate=errors, seed=seed).start()
+    server.route_session(http_transport.get_session())
+
+    def speak(text: str, code: str):
+        start = time.perf_counter()
+        try:
+            excuse_engine.synthesize_speech(text, code)
+        except Exception as exc:
+            return None, repr(exc)
+        return time.perf_counter() - start, None
+
+    router = excuse_engine.get_tts_router()
+    for code, text in _texts(server.fixtures).items():
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(
+                lambda i: speak(f"{text} ({i})", code), range(clips)
+            ))
+        wall = time.perf_counter() - started
+        latencies = [seconds for seconds, error in outcomes if error is None]
+        result["languages"][code] = {
+            "latency": summarize(latencies),
+            "clips_per_second": len(latencies) / wall if wall else 0.0,
+            "offline": sum(row["wins"] for row in router.profile_rows()
+                           if row["task"] == code and row["model"] != "gtts"),
+            "failures": [error for _, error in outcomes if error is not None],
+        }
+    server.stop()
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def spawn(backend: str, condition: str, args) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", backend, condition,
+               "--clips", str(args.clips), "--concurrency", str(args.concurrency),
+               "--seed", str(args.seed)]
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{backend}/{condition} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_report(results: list) -> None:
+    print(f"{'backend':<9}{'network':<9}{'lang':<6}{'n':>4}{'p50':>9}{'p95':>9}"
+          f"{'clips/s':>9}{'offline':>9}{'failed':>8}")
+    for result in results:
+        if "skipped" in result:
+            print(f"{result['backend']:<9}{result['condition']:<9}skipped: {result['skipped']}")
+            continue
+        for code, stats in result["languages"].items():
+            latency = stats["latency"]
+            print(f"{result['backend']:<9}{result['condition']:<9}{code:<6}{latency['count']:>4}"
+                  f"{latency['p50'] * 1000:>7.0f}ms{latency['p95'] * 1000:>7.0f}ms"
+                  f"{stats['clips_per_second']:>9.2f}{stats['offline']:>9}"
+                  f"{len(stats['failures']):>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", action="append", choices=BACKENDS,
+                        help="repeatable (default: all)")
+    parser.add_argument("--condition", action="append", choices=list(CONDITIONS),
+                        help="mock gTTS network condition, repeatable (default: healthy)")
+    parser.add_argument("--clips", type=int, default=10, help="clips per language")
+    parser.add_argument("--concurrency", type=int, default=4, help="clips in flight at once")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results here")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = run_backend(*args.child, args.clips, args.concurrency, args.seed)
+        print(json.dumps(result))
+        return 0
+
+    results = [spawn(backend, condition, args)
+               for condition in args.condition or ["healthy"]
+               for backend in args.backend or BACKENDS]
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+            fh.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# deadline.py
+import threading
+import time
+
+
+class Deadline:
+    """A time budget shared by every stage of one request.
+
+        deadline = Deadline(6.0)
+        generate_excuse(..., deadline=deadline)    # stages time out at the budget
+        deadline.degraded                          # e.g. ["translate", "tts"]
+
+    Required stages use what is left as their timeout; optional ones are
+    skipped or served from a fallback once it runs out, and say so with
+    ``degrade(stage)``.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self.degraded = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float | None = None) -> float:
+        """What is left of the budget, but no more than a stage's own *cap*."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def degrade(self, stage: str) -> None:
+        with self._lock:
+            if stage not in self.degraded:
+                self.degraded.append(stage)
@@ -0,0 +1,137 @@
+# dedup.py
+import hashlib
+import random
+import re
+from collections import OrderedDict
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(1337)  # fixed seed: signatures must be stable across reruns
+
+
+class MinHasher:
+    """MinHash signatures over word shingles (character shingles for
+    scripts without spaces), bucketed with LSH bands for O(1) lookup."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle: int = 3):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self._perms = [
+            (_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE))
+            for _ in range(num_perm)
+        ]
+
+    def _shingles(self, text: str) -> set:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < self.shingle:
+            chars = "".join(words)
+            k = self.shingle + 2
+            return {chars[i:i + k] for i in range(max(1, len(chars) - k + 1))}
+        return {
+            " ".join(words[i:i + self.shingle])
+            for i in range(len(words) - self.shingle + 1)
+        }
+
+    def signature(self, text: str) -> tuple:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in self._shingles(text)
+        ]
+        return tuple(
+            min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms
+        )
+
+    def bands_of(self, sig: tuple):
+        for i in range(self.bands):
+            yield i, sig[i * self.rows:(i + 1) * self.rows]
+
+    @staticmethod
+    def similarity(a: tuple, b: tuple) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class ExcuseSet:
+    """Insertion-ordered set of excuses with optional near-duplicate suppression.
+
+    Exact membership is a dict lookup.  With ``threshold`` set, texts whose
+    estimated Jaccard similarity to a stored entry reaches it are dropped
+    and counted in ``suppressed`` instead of stored.  ``maxlen`` turns the
+    set into a ring buffer that forgets the oldest entries first.
+    Supports the list operations the app uses (append/extend/clear,
+    iteration, reversed, len, in).
+    """
+
+    def __init__(self, items=(), maxlen: int | None = None, threshold: float | None = None,
+                 hasher: MinHasher | None = None):
+        self.maxlen = maxlen
+        self.threshold = threshold
+        self.suppressed = 0
+        self._items = OrderedDict()          # text -> signature (or None)
+        self._buckets = {}                   # (band, rows) -> set of texts
+        self._hasher = hasher or (MinHasher() if threshold else None)
+        self.extend(items)
+
+    def _near_duplicate(self, sig: tuple) -> bool:
+        seen = set()
+        for band in self._hasher.bands_of(sig):
+            for other in self._buckets.get(band, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                if MinHasher.similarity(sig, self._items[other]) >= self.threshold:
+                    return True
+        return False
+
+    def add(self, text: str) -> bool:
+        """Store *text*; return False if it was an exact or near duplicate."""
+        if text in self._items:
+            return False
+        sig = None
+        if self.threshold:
+            sig = self._hasher.signature(text)
+            if self._near_duplicate(sig):
+                self.suppressed += 1
+                return False
+            for band in self._hasher.bands_of(sig):
+                self._buckets.setdefault(band, set()).add(text)
+        self._items[text] = sig
+        if self.maxlen is not None and len(self._items) > self.maxlen:
+            self._discard_oldest()
+        return True
+
+    append = add
+
+    def extend(self, texts) -> None:
+        for text in texts:
+            self.add(text)
+
+    def _discard_oldest(self) -> None:
+        text, sig = self._items.popitem(last=False)
+        if sig is not None:
+            for band in self._hasher.bands_of(sig):
+                bucket = self._buckets.get(band)
+                if bucket is not None:
+                    bucket.discard(text)
+                    if not bucket:
+                        del self._buckets[band]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._buckets.clear()
+        self.suppressed = 0
+
+    def __contains__(self, text) -> bool:
+        return text in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
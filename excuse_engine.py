@@ -0,0 +1,900 @@
+# excuse_engine.py
+"""Excuse generation, translation, ranking and speech, without Streamlit.
+
+app.py renders these; batch.py runs them headless.  Every shared object
+(caches, the OpenRouter gate, worker pool, metrics) is built on first use
+and then reused by every caller in the process.
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from itertools import chain
+from io import BytesIO
+
+import requests
+
+import http_transport
+from audio_cache import AudioCache
+from believability import RANK_LABELS, score_excuse
+from deadline import Deadline
+from language_check import is_language
+from metrics import Metrics
+from response_cache import ResponseCache, SQLiteStore, TwoTierCache, make_key
+from settings import get_settings
+from routing import Router
+from throttle import ThrottledError, UpstreamGate
+from tts_backends import BackendBusy, EspeakBackend, GTTSBackend
+
+# ─────────────────────────────────────────
+#  CONSTANTS
+# ─────────────────────────────────────────
+CACHE_DB = "excuse_cache.db"
+CACHE_MAX_ENTRIES = 512          # in-memory LRU tier
+CACHE_TTL = 7 * 24 * 3600        # seconds, both tiers
+CACHE_VARIANTS = 3               # completions sampled per prompt
+OPENROUTER_MODEL = "mistralai/mixtral-8x7b-instruct"
+MODEL_ROUTES = {                 # models per task, preferred first; later ones are hedges
+    "excuse": [OPENROUTER_MODEL, "meta-llama/llama-3.1-8b-instruct"],
+    "apology": [OPENROUTER_MODEL, "meta-llama/llama-3.1-8b-instruct"],
+    "emergency": [OPENROUTER_MODEL, "mistralai/mistral-7b-instruct"],
+    "rank": [OPENROUTER_MODEL, "mistralai/mistral-7b-instruct"],
+}
+OPENROUTER_TIMEOUT = 30          # seconds per upstream request
+TTS_TIMEOUT = 20                 # seconds per speech request
+TTS_CHUNK_WORKERS = 16           # gTTS chunks fetched at once, across all sessions
+TTS_GTTS_CLIPS = 8               # gTTS clips in flight before new ones skip to the next backend
+TTS_HEDGE_DELAY = 3.0            # most we wait on a backend before also asking the next
+TTS_PROBE_EVERY = 5              # while gTTS is demoted, every Nth clip still tries it first
+ROUTE_TIMEOUT = 45               # seconds before a routed call gives up on every model
+HEDGE_DELAY = 2.5                # hedge delay until a model has a p95 of its own
+HEDGE_MIN_DELAY = 0.25           # never hedge sooner than this
+OPENROUTER_RPS = 2.0             # sustained requests/second across all sessions
+OPENROUTER_BURST = 5             # requests allowed back-to-back before throttling
+OPENROUTER_RESERVE = 2           # of that burst, tokens background calls (refills) can't take
+OPENROUTER_MAX_CONCURRENCY = 8   # upstream requests in flight at once
+OPENROUTER_QUEUE_TIMEOUT = 30    # seconds a request may wait for a slot
+PIPELINE_WORKERS = 8             # shared pool for independent post-generation stages
+AUDIO_CACHE_DIR = ".audio_cache"
+AUDIO_CACHE_MAX_BYTES = 200 * 1024 * 1024  # total MP3 bytes kept on disk
+AUDIO_MEMORY_CLIPS = 64          # hottest clips kept in memory
+TRANSLATION_CACHE_ENTRIES = 5000  # on-disk translations kept; oldest-written evicted first
+METRICS_FILE = "metrics.prom"   # Prometheus text export, rewritten periodically
+METRICS_LOG = "metrics.jsonl"   # one JSON line per timed stage
+METRICS_EXPORT_SECONDS = 10     # minimum gap between METRICS_FILE rewrites
+METRICS_PORT = None             # set to a port number to also serve /metrics over HTTP
+RANK_BATCH_SIZE = 10             # excuses scored per ranking call
+RANK_CONFIDENCE_THRESHOLD = 0.75  # below this the local scorer escalates to the LLM
+RANK_SHADOW_RATE = 0.05          # confident local labels also sent to the LLM, as samples only
+EXCUSE_CANDIDATES = 3            # excuses requested per generation call, best shown first
+NATIVE_GENERATION = True         # ask the model for non-English text instead of translating
+DEFAULT_RANK = RANK_LABELS[1]
+TTS_BACKENDS = {                 # speech backends per language code, preferred first
+    "en": ["gtts", "espeak"],
+    "hi": ["gtts", "espeak"],
+    "ta": ["gtts", "espeak"],
+    "te": ["gtts", "espeak"],
+    "es": ["gtts", "espeak"],
+}
+LANGUAGE_CODES = {
+    "English": "en",
+    "Hindi": "hi",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Spanish": "es",
+}
+
+settings = get_settings()
+
+
+class GenerationError(RuntimeError):
+    """The model call behind a generation step failed."""
+
+
+def _budget(deadline: Deadline | None, cap: float | None) -> float | None:
+    """A stage's timeout: its own *cap*, cut to what is left of *deadline*."""
+    return cap if deadline is None else deadline.timeout(cap)
+
+
+def _within(deadline: Deadline | None, stage: str, fallback, fn, *args):
+    """Run ``fn(*args)`` in this thread, giving up at *deadline* with *fallback*.
+
+    What is left of the deadline becomes the default timeout of *fn*'s
+    HTTP requests; a TimeoutError, or a request failing once the deadline
+    has passed, counts as running out.
+    """
+    if deadline is None:
+        return fn(*args)
+    if deadline.expired():
+        deadline.degrade(stage)
+        return fallback
+    try:
+        with http_transport.default_timeout(deadline.remaining()):
+            return fn(*args)
+    except (TimeoutError, requests.RequestException) as exc:
+        # A read timeout surfaces as ConnectionError once retries are spent.
+        if not isinstance(exc, (TimeoutError, requests.Timeout)) and not deadline.expired():
+            raise
+        deadline.degrade(stage)
+        return fallback
+
+
+def _shared(factory):
+    """Build ``factory()`` once per process on first call, like st.cache_resource.
+
+    Exceptions are not cached, so a failed build is retried next time.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @wraps(factory)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(factory())
+        return built[0]
+
+    return get
+
+
+# ─────────────────────────────────────────
+#  SHARED RESOURCES
+# ─────────────────────────────────────────
+
+@_shared
+def get_executor() -> ThreadPoolExecutor:
+    """Worker pool for independent stages (rank, TTS, batch translation)."""
+    return ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="stage")
+
+
+@_shared
+def get_tts_pool() -> ThreadPoolExecutor:
+    """Fetches gTTS chunks; separate from the pools whose tasks wait on them."""
+    return ThreadPoolExecutor(max_workers=TTS_CHUNK_WORKERS, thread_name_prefix="tts")
+
+
+@_shared
+def get_tts_backends() -> dict:
+    """Installed speech backends by name; espeak needs its binaries."""
+    espeak = EspeakBackend()
+    # Without a local engine there is nothing to skip to, so gTTS queues instead.
+    max_clips = TTS_GTTS_CLIPS if espeak.available() else None
+    backends = [GTTSBackend(http_transport.get_session(), get_tts_pool(), max_clips), espeak]
+    return {backend.name: backend for backend in backends if backend.available()}
+
+
+@_shared
+def get_tts_router() -> Router:
+    """Per-language backend order; a slow or failing gTTS hands over to espeak.
+
+    espeak is always faster, so speed alone doesn't demote gTTS: only
+    errors or a p95 past the hedge delay do, and probes bring it back.
+    """
+    installed = get_tts_backends()
+    return Router(
+        {code: [name for name in names if name in installed]
+         for code, names in TTS_BACKENDS.items()},
+        window=10,
+        hedge_delay=TTS_HEDGE_DELAY,
+        max_hedge_delay=TTS_HEDGE_DELAY,
+        timeout=TTS_TIMEOUT,
+        slow_factor=float("inf"),
+        probe_every=TTS_PROBE_EVERY,
+        workers=4 * PIPELINE_WORKERS,    # abandoned gTTS attempts hold a worker until done
+        neutral=(BackendBusy,),
+    )
+
+
+@_shared
+def get_metrics() -> Metrics:
+    """Stage timings for every session; see metrics.py."""
+    metrics = Metrics(
+        prom_path=METRICS_FILE, log_path=METRICS_LOG, export_interval=METRICS_EXPORT_SECONDS
+    )
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    return metrics
+
+
+@_shared
+def get_response_cache() -> ResponseCache:
+    """One cache per process, shared by every session."""
+    return ResponseCache(
+        CACHE_DB, maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, variants=CACHE_VARIANTS
+    )
+
+
+@_shared
+def get_openrouter_gate() -> UpstreamGate:
+    """Rate limit, concurrency cap and single-flight for every session."""
+    return UpstreamGate(
+        rate=OPENROUTER_RPS,
+        burst=OPENROUTER_BURST,
+        max_concurrency=OPENROUTER_MAX_CONCURRENCY,
+        queue_timeout=OPENROUTER_QUEUE_TIMEOUT,
+        reserve=OPENROUTER_RESERVE,
+    )
+
+
+@_shared
+def get_router() -> Router:
+    """Model choice, latency profiles and hedging for every session."""
+    return Router(
+        MODEL_ROUTES,
+        hedge_delay=HEDGE_DELAY,
+        min_hedge_delay=HEDGE_MIN_DELAY,
+        timeout=ROUTE_TIMEOUT,
+        workers=2 * OPENROUTER_MAX_CONCURRENCY,
+        neutral=(ThrottledError,),
+    )
+
+
+@_shared
+def get_openai():
+    """The openai module, configured for OpenRouter on the shared session."""
+    import openai
+
+    openai.api_key = settings.openrouter_api_key
+    openai.api_base = settings.openrouter_api_base
+    http_transport.route_openai(openai)
+    return openai
+
+
+# ─────────────────────────────────────────
+#  LLM CALLS
+# ─────────────────────────────────────────
+
+OPENROUTER_HEADERS = {
+    "HTTP-Referer": "https://excuse-generator.streamlit.app",
+    "X-Title": "Intelligent Excuse Generator",
+}
+
+
+def call_openai(prompt: str, max_tokens: int = 300, temperature: float = 0.7,
+                stream: bool = False, task: str = "excuse", deadline: Deadline | None = None,
+                fresh: bool = False, background: bool = False):
+    """Return the completion text, or a token generator when ``stream=True``.
+
+    *task* picks the model route (see MODEL_ROUTES); with a *deadline*
+    the call gives up when it runs out.  A non-streamed ``fresh=True``
+    call skips the cached variants and always asks the model; its answer
+    is still cached for others.  ``background=True`` (refills, shadow
+    checks) leaves OPENROUTER_RESERVE of the rate-limit burst to users.
+    """
+    if stream:
+        return _stream_openai(prompt, max_tokens, temperature, task, deadline)
+    if not settings.openrouter_api_key:
+        return "❌ OPENROUTER_API_KEY is missing. Add it to Streamlit secrets."
+    if deadline is not None and deadline.expired():
+        return "❌ Out of time."
+    with get_metrics().span("llm", task=task, model=MODEL_ROUTES[task][0]) as span:
+        span.bytes_out = len(prompt.encode())
+        text = _complete(prompt, max_tokens, temperature, task, deadline, span, fresh, background)
+        span.bytes_in = len(text.encode())
+        return text
+
+
+def _request(model: str, prompt: str, max_tokens: int, temperature: float,
+             deadline: Deadline | None, background: bool = False) -> str:
+    """One upstream completion; every attempt, hedges included, takes a gate slot."""
+    with get_openrouter_gate().slot(_budget(deadline, None), background):
+        response = get_openai().ChatCompletion.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            headers=OPENROUTER_HEADERS,
+            request_timeout=_budget(deadline, OPENROUTER_TIMEOUT),
+        )
+    return response["choices"][0]["message"]["content"].strip()
+
+
+def _complete(prompt: str, max_tokens: int, temperature: float, task: str,
+              deadline: Deadline | None, span, fresh: bool = False,
+              background: bool = False) -> str:
+    cache = get_response_cache()
+    # Keyed on the task's primary model, whichever model ends up answering.
+    key = cache.key(MODEL_ROUTES[task][0], prompt, temperature, max_tokens)
+    cached = None if fresh else cache.lookup(key)
+    span.cache = "miss" if cached is None else "hit"
+    if cached is not None:
+        return cached
+
+    def fetch(bound: Deadline | None = None) -> tuple:
+        text, model = get_router().call(
+            task,
+            lambda model: _request(model, prompt, max_tokens, temperature, bound, background),
+            timeout=_budget(bound, None),
+        )
+        if text:
+            cache.store(key, text)
+        return text, model
+
+    try:
+        if fresh:
+            text, span.labels["model"] = fetch(deadline)
+        else:
+            # Identical prompts already in flight share that request.  It
+            # isn't bound by any one caller's deadline; each caller only
+            # waits for it until its own runs out.
+            text, span.labels["model"] = get_openrouter_gate().coalesce(
+                key, fetch, timeout=_budget(deadline, None)
+            )
+        return text
+    except Exception as exc:
+        span.fail(exc)
+        return f"❌ API error: {exc}"
+
+
+def _stream_openai(prompt: str, max_tokens: int, temperature: float, task: str,
+                   deadline: Deadline | None):
+    """Yield completion tokens as they arrive; cache hits yield one chunk."""
+    if not settings.openrouter_api_key:
+        yield "❌ OPENROUTER_API_KEY is missing. Add it to Streamlit secrets."
+        return
+    if deadline is not None and deadline.expired():
+        yield "❌ Out of time."
+        return
+    with get_metrics().span("llm_stream", task=task, model=MODEL_ROUTES[task][0]) as span:
+        span.bytes_out = len(prompt.encode())
+        for token in _complete_stream(prompt, max_tokens, temperature, task, deadline, span):
+            span.bytes_in += len(token.encode())
+            yield token
+
+
+def _stream_tokens(model: str, prompt: str, max_tokens: int, temperature: float,
+                   deadline: Deadline | None):
+    """Yield one streamed completion's tokens, holding a gate slot until closed."""
+    with get_openrouter_gate().slot(_budget(deadline, None)):
+        for chunk in get_openai().ChatCompletion.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            headers=OPENROUTER_HEADERS,
+            stream=True,
+            request_timeout=_budget(deadline, OPENROUTER_TIMEOUT),
+        ):
+            token = chunk["choices"][0].get("delta", {}).get("content")
+            if token:
+                yield token
+
+
+def _open_stream(model: str, prompt: str, max_tokens: int, temperature: float,
+                 deadline: Deadline | None) -> tuple:
+    """Start a stream and wait for its first token: ``(first, rest)``.
+
+    Streams are hedged, and held to a deadline, on time to first token:
+    the latency users see.  The rest streams under the per-read timeout
+    only; the deadline doesn't cover it.
+    """
+    tokens = _stream_tokens(model, prompt, max_tokens, temperature, deadline)
+    return next(tokens, ""), tokens
+
+
+def _complete_stream(prompt: str, max_tokens: int, temperature: float, task: str,
+                     deadline: Deadline | None, span):
+    cache = get_response_cache()
+    key = cache.key(MODEL_ROUTES[task][0], prompt, temperature, max_tokens)
+    cached = cache.lookup(key)
+    span.cache = "miss" if cached is None else "hit"
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    try:
+        (first, rest), span.labels["model"] = get_router().call(
+            task,
+            lambda model: _open_stream(model, prompt, max_tokens, temperature, deadline),
+            stream=True,
+            discard=lambda opened: opened[1].close(),
+            timeout=_budget(deadline, None),
+        )
+        span.labels["first_token_ms"] = round((time.time() - span.started) * 1000, 1)
+        try:
+            # Past the first token the deadline no longer applies: a slow
+            # stream is shown as it arrives rather than cut off mid-excuse.
+            for token in chain([first] if first else [], rest):
+                parts.append(token)
+                yield token
+        finally:
+            rest.close()                 # releases the gate slot if abandoned early
+    except Exception as exc:
+        span.fail(exc)
+        if not parts:
+            yield f"❌ API error: {exc}"
+        return
+    text = "".join(parts).strip()
+    if text:
+        cache.store(key, text)
+
+
+# ─────────────────────────────────────────
+#  TRANSLATION
+# ─────────────────────────────────────────
+
+@_shared
+def get_translation_cache() -> TwoTierCache:
+    """Translations keyed on (text hash, target language)."""
+    return TwoTierCache(
+        CACHE_DB, table="translations", maxsize=CACHE_MAX_ENTRIES, ttl=None,
+        max_entries=TRANSLATION_CACHE_ENTRIES,
+    )
+
+
+@_shared
+def _translator_slots() -> threading.local:
+    http_transport.route_deep_translator()
+    return threading.local()
+
+
+def get_translator(target: str):
+    """Reuse one GoogleTranslator per language and thread.
+
+    Instances keep per-request URL params on ``self``, so they can't be
+    shared between the pool's worker threads.
+    """
+    slots = _translator_slots()
+    if not hasattr(slots, "by_lang"):
+        slots.by_lang = {}
+    if target not in slots.by_lang:
+        from deep_translator import GoogleTranslator
+
+        slots.by_lang[target] = GoogleTranslator(source="auto", target=target)
+    return slots.by_lang[target]
+
+
+def _translate(text: str, target: str) -> str:
+    with get_metrics().span("translate", target=target) as span:
+        span.bytes_out = len(text.encode())
+        cache = get_translation_cache()
+        key = make_key(text, target)
+        cached = cache.get(key)
+        span.cache = "miss" if cached is None else "hit"
+        if cached is not None:
+            span.bytes_in = len(cached.encode())
+            return cached
+        result = get_translator(target).translate(text)
+        if not result:
+            return text
+        span.bytes_in = len(result.encode())
+        cache.set(key, result)
+        return result
+
+
+def translate_text(text: str, lang: str, deadline: Deadline | None = None) -> str:
+    """Translate into *lang* (a LANGUAGE_CODES name); raises if the translator fails.
+
+    Past the *deadline*, a cached translation or else the original text is
+    returned instead.
+    """
+    if lang == "English" or not text or text.startswith("❌"):
+        return text
+    target = LANGUAGE_CODES[lang]
+    if deadline is not None and deadline.expired():
+        cached = get_translation_cache().peek(make_key(text, target))
+        if cached is not None:
+            return cached
+    return _within(deadline, "translate", text, _translate, text, target)
+
+
+def ensure_language(text: str, lang: str, deadline: Deadline | None = None) -> str:
+    """*text* in *lang*: kept as is if the local language check passes,
+    otherwise translated (the model ignored the language, or wasn't asked)."""
+    if lang == "English" or not text or text.startswith("❌"):
+        return text
+    code = LANGUAGE_CODES[lang]
+    with get_metrics().span("langcheck", lang=code) as span:
+        native = is_language(text, code)
+        span.labels["result"] = "pass" if native else "fail"
+    return text if native else translate_text(text, lang, deadline)
+
+
+def translate_batch(texts: list, lang: str) -> tuple:
+    """Translate many strings at once; cache misses run concurrently.
+
+    Returns ``(translations, failed)``; failed items come back untranslated.
+    """
+    if lang == "English":
+        return list(texts), 0
+    target = LANGUAGE_CODES[lang]
+    pending = {
+        text: get_executor().submit(_translate, text, target)
+        for text in dict.fromkeys(texts)
+        if text and not text.startswith("❌")
+    }
+    done, failed = {}, 0
+    for text, future in pending.items():
+        try:
+            done[text] = future.result()
+        except Exception:
+            failed += 1
+    return [done.get(text, text) for text in texts], failed
+
+
+# ─────────────────────────────────────────
+#  RANKING
+# ─────────────────────────────────────────
+
+@_shared
+def get_rank_cache() -> TwoTierCache:
+    """Believability labels keyed by excuse hash, so nothing is ranked twice."""
+    return TwoTierCache(CACHE_DB, table="rankings", maxsize=CACHE_MAX_ENTRIES, ttl=None)
+
+
+@_shared
+def get_rank_samples() -> SQLiteStore:
+    """(excuse, LLM label) pairs used by ``python believability.py`` reports."""
+    return SQLiteStore(CACHE_DB, table="rank_samples")
+
+
+def parse_rank(text: str) -> str | None:
+    """Map free-form model output onto one of RANK_LABELS."""
+    for label in RANK_LABELS:
+        emoji, word = label.split(" ", 1)
+        if emoji in text or word.lower() in text.lower():
+            return label
+    return None
+
+
+def ai_rank_excuse(excuse_text: str, category: str | None = None,
+                   scenario: str | None = None, deadline: Deadline | None = None,
+                   background: bool = False) -> str:
+    """Believability label; the local scorer's guess stands when the LLM
+    gives no usable answer, e.g. past the *deadline*."""
+    with get_metrics().span("rank") as span:
+        span.bytes_out = len(excuse_text.encode())
+        return _rank_one(excuse_text, category, scenario, deadline, span, background)
+
+
+def _rank_one(excuse_text: str, category: str | None, scenario: str | None,
+              deadline: Deadline | None, span, background: bool = False) -> str:
+    cache = get_rank_cache()
+    key = make_key(excuse_text)
+    cached = cache.get(key)
+    span.cache = "miss" if cached is None else "hit"
+    if cached is not None:
+        return cached
+    local, confidence = score_excuse(excuse_text, category, scenario)
+    span.labels["via"] = "local" if confidence >= RANK_CONFIDENCE_THRESHOLD else "llm"
+    if confidence >= RANK_CONFIDENCE_THRESHOLD:
+        cache.set(key, local)
+        _shadow_check([excuse_text], category, scenario)
+        return local
+    prompt = (
+        f'Evaluate this excuse for believability:\n\n"{excuse_text}"\n\n'
+        "Respond with ONLY one of these:\n"
+        "🟢 Highly Believable\n"
+        "🟡 Somewhat Believable\n"
+        "🔴 Less Believable"
+    )
+    result = call_openai(prompt, max_tokens=20, temperature=0.3, task="rank", deadline=deadline,
+                         background=background)
+    label = None if result.startswith("❌") else parse_rank(result)
+    if label is None:
+        if deadline is not None and deadline.expired():
+            deadline.degrade("rank")
+        return local
+    cache.set(key, label)
+    get_rank_samples().set(key, [excuse_text, label, category, scenario])
+    return label
+
+
+def _shadow_check(excuses: list, category: str | None, scenario: str | None) -> None:
+    """Send a RANK_SHADOW_RATE share of confidently scored *excuses* to the
+    LLM in the background.
+
+    Only rank samples are recorded, so ``agreement_report`` sees how the
+    scorer does above RANK_CONFIDENCE_THRESHOLD; callers keep the local label.
+    """
+    sample = [exc for exc in excuses if random.random() < RANK_SHADOW_RATE]
+    if sample:
+        get_executor().submit(_record_samples, sample, category, scenario)
+
+
+def _record_samples(excuses: list, category: str | None, scenario: str | None) -> None:
+    for exc, label in zip(excuses, _rank_batch(excuses, background=True)):
+        if label is not None:
+            get_rank_samples().set(make_key(exc), [exc, label, category, scenario])
+
+
+def _rank_batch(excuses: list, deadline: Deadline | None = None,
+                background: bool = False) -> list:
+    """Score several excuses with one structured call; unparsed slots are None."""
+    numbered = "\n".join(f'{i}. "{exc}"' for i, exc in enumerate(excuses, 1))
+    prompt = (
+        f"Evaluate each of these excuses for believability:\n\n{numbered}\n\n"
+        "Respond with ONLY one line per excuse, in the same order, formatted as "
+        "'<number>. <rating>' where <rating> is one of:\n"
+        "🟢 Highly Believable\n"
+        "🟡 Somewhat Believable\n"
+        "🔴 Less Believable"
+    )
+    result = call_openai(
+        prompt, max_tokens=15 * len(excuses) + 20, temperature=0.3, task="rank",
+        deadline=deadline, background=background,
+    )
+    labels = [None] * len(excuses)
+    if result.startswith("❌"):
+        return labels
+    for line in result.splitlines():
+        match = re.match(r"\s*(\d+)\s*[.):-]\s*(.+)", line)
+        if match and 1 <= int(match.group(1)) <= len(excuses):
+            labels[int(match.group(1)) - 1] = parse_rank(match.group(2))
+    return labels
+
+
+def cached_rankings(excuses) -> dict:
+    """Already-known labels for *excuses*; never calls the API.
+
+    One memory pass and one batched disk query, however many excuses.
+    """
+    keys = {exc: make_key(exc) for exc in excuses}
+    labels = get_rank_cache().peek_many(keys.values())
+    return {exc: labels[key] for exc, key in keys.items() if key in labels}
+
+
+def rank_excuses(excuses, deadline: Deadline | None = None, category: str | None = None,
+                 scenario: str | None = None) -> dict:
+    """Rank many excuses in RANK_BATCH_SIZE batches, run concurrently.
+
+    Cached labels are reused; only unseen excuses reach the API.  Batches
+    cut off by the *deadline* are left out of the result.  *category* and
+    *scenario*, when known, are stored with the LLM labels for
+    ``believability.agreement_report``.
+    """
+    cache = get_rank_cache()
+    scores = cached_rankings(excuses)
+    pending = [exc for exc in dict.fromkeys(excuses) if exc not in scores]
+    batches = [
+        pending[i:i + RANK_BATCH_SIZE] for i in range(0, len(pending), RANK_BATCH_SIZE)
+    ]
+    with get_metrics().span("rank_batch", excuses=len(pending)) as span:
+        span.cache = "miss" if pending else "hit"
+        if len(batches) == 1:
+            # Inline: callers may already be running on the executor.
+            results = [_rank_batch(batches[0], deadline)]
+        else:
+            futures = [get_executor().submit(_rank_batch, b, deadline) for b in batches]
+            results = (future.result() for future in futures)
+        for batch, labels in zip(batches, results):
+            for exc, label in zip(batch, labels):
+                if label is not None:
+                    cache.set(make_key(exc), label)
+                    get_rank_samples().set(make_key(exc), [exc, label, category, scenario])
+                    scores[exc] = label
+    return scores
+
+
+def sort_by_rank(excuses: list, scores: dict) -> list:
+    """Most believable first; unranked entries keep their order at the end."""
+    order = {label: i for i, label in enumerate(RANK_LABELS)}
+    return sorted(excuses, key=lambda exc: order.get(scores.get(exc), len(order)))
+
+
+# ─────────────────────────────────────────
+#  SPEECH
+# ─────────────────────────────────────────
+
+@_shared
+def get_audio_cache() -> AudioCache:
+    return AudioCache(
+        AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES, memory_items=AUDIO_MEMORY_CLIPS
+    )
+
+
+def synthesize_speech(text: str, lang_code: str, slow: bool = False,
+                      deadline: Deadline | None = None) -> bytes | None:
+    """Return MP3 bytes for *text*; safe to call off the script thread.
+
+    The language's TTS_BACKENDS are tried in order, with a hedge to the
+    next after TTS_HEDGE_DELAY.  With a *deadline*, returns None if the
+    audio isn't ready in time; the attempts still running finish in the
+    router's pool and cache their audio for next time.
+    """
+    return _within(deadline, "tts", None, _synthesize, text, lang_code, slow,
+                   _budget(deadline, TTS_TIMEOUT))
+
+
+def _synthesize(text: str, lang_code: str, slow: bool, timeout: float) -> bytes:
+    with get_metrics().span("tts", lang=lang_code) as span:
+        span.bytes_out = len(text.encode())
+        cache = get_audio_cache()
+        key = cache.key(text, lang_code, slow)
+        audio = cache.get(key)
+        span.cache = "miss" if audio is None else "hit"
+        if audio is None:
+            backends = get_tts_backends()
+            router = get_tts_router()
+
+            def attempt(name: str) -> bytes:
+                clip = backends[name].synthesize(text, lang_code, slow, timeout)
+                # Fallback audio is cheap to remake; keep the slot for the preferred voice.
+                if name == router.routes[lang_code][0]:
+                    cache.put(key, clip)
+                return clip
+
+            audio, span.labels["backend"] = router.call(lang_code, attempt, timeout=timeout)
+        span.bytes_in = len(audio)
+        return audio
+
+
+# ─────────────────────────────────────────
+#  GENERATORS
+# ─────────────────────────────────────────
+
+def generate_excuse(category: str, scenario: str, urgency: str, stream: bool = False,
+                    n: int = 1, deadline: Deadline | None = None, language: str = "English",
+                    fresh: bool = False, background: bool = False):
+    """One excuse, or with ``n > 1`` a numbered list of *n* distinct ones
+    from the same request; split those with ``parse_candidates``.
+
+    With NATIVE_GENERATION the model writes in *language* directly; pass
+    the result through ``ensure_language`` either way.
+    """
+    native = NATIVE_GENERATION and language != "English"
+    if n == 1:
+        prompt = (
+            f"Write a realistic and believable excuse for someone dealing with '{scenario}' "
+            f"related to {category}, with {urgency} urgency. "
+            "Write it as a natural paragraph (2-4 sentences) that someone would actually say. "
+            "Make it sound genuine and conversational. Do not use bullet points or lists."
+        )
+        if native:
+            prompt += f" Write it in {language}."
+        return call_openai(prompt, max_tokens=300, stream=stream, deadline=deadline, fresh=fresh,
+                           background=background)
+    prompt = (
+        f"Write {n} different realistic and believable excuses for someone dealing with "
+        f"'{scenario}' related to {category}, with {urgency} urgency. "
+        "Each one is a natural paragraph (2-4 sentences) that someone would actually say, "
+        "genuine and conversational, with a different reason from the others. "
+        f"Number them 1. to {n}., one per line, with no other text."
+    )
+    if native:
+        prompt += f" Write them all in {language}, keeping the numbers 1. to {n}."
+    return call_openai(
+        prompt, max_tokens=160 * n, stream=stream, deadline=deadline, fresh=fresh,
+        background=background,
+    )
+
+
+# "1. ", "1) ", "1 - " or "**1.** ", not a time like "3:30".
+_CANDIDATE_NUMBER = re.compile(r"\s*(?:\*\*)?\d+(?:[.)]|\s+-)(?:\*\*)?\s+(.*)")
+
+
+def parse_candidates(text: str) -> list:
+    """Split a numbered multi-excuse completion into its excuses.
+
+    Numbers may read ``1.``, ``1)``, ``1 -`` or ``**1.**``; anything before
+    the first one is a preamble and dropped.  Unnumbered text (a model
+    that ignored the format) is one candidate.
+    """
+    lines = text.strip().splitlines()
+    matches = [_CANDIDATE_NUMBER.match(line) for line in lines]
+    if not any(matches):
+        candidates = [" ".join(line.strip() for line in lines)]
+    else:
+        candidates = []
+        for line, match in zip(lines, matches):
+            if match:
+                candidates.append(match.group(1))
+            elif candidates:
+                candidates[-1] += " " + line.strip()
+    candidates = [c.strip(' *"') for c in candidates]
+    return [c for c in dict.fromkeys(candidates) if c]
+
+
+def pick_best(candidates: list, category: str | None = None,
+              scenario: str | None = None, deadline: Deadline | None = None) -> list:
+    """Rank *candidates*, most believable first: ``[{"text", "rank"}, ...]``.
+
+    The local scorer decides when it is confident about every candidate,
+    and those labels are cached; otherwise the uncertain ones share a
+    single batched ranking call, unless the *deadline* has run out.
+    """
+    with get_metrics().span("best_of", candidates=len(candidates)) as span:
+        scored = {text: score_excuse(text, category, scenario) for text in candidates}
+        uncertain = [t for t, (_, conf) in scored.items() if conf < RANK_CONFIDENCE_THRESHOLD]
+        span.labels["via"] = "llm" if uncertain else "local"
+        labels = {text: label for text, (label, _) in scored.items()}
+        confident = [text for text in scored if text not in uncertain]
+        cache = get_rank_cache()
+        for text in confident:           # History badges and "Rank all" reuse these
+            cache.set(make_key(text), labels[text])
+        _shadow_check(confident, category, scenario)
+        if uncertain:
+            expired = deadline is not None and deadline.expired()
+            ranked = {} if expired else rank_excuses(uncertain, deadline, category, scenario)
+            labels.update(ranked)
+            if len(ranked) < len(uncertain) and deadline is not None and deadline.expired():
+                deadline.degrade("rank")     # local labels stand in
+        order = {label: i for i, label in enumerate(RANK_LABELS)}
+        ranked = sorted(
+            candidates, key=lambda t: (order.get(labels[t], len(order)), -scored[t][1])
+        )
+        return [{"text": text, "rank": labels[text]} for text in ranked]
+
+
+def simulate_emergency(relation: str, context: str) -> tuple:
+    prompt = (
+        f"Generate a realistic urgent text message from {relation} about a {context}. "
+        "Keep it under 25 words and make it sound genuinely urgent. "
+        "Only return the message text, nothing else."
+    )
+    sms = call_openai(prompt, max_tokens=60, temperature=0.7, task="emergency")
+    return f"📞 Incoming Call: {relation}", f"📬 {sms}"
+
+
+def generate_apology(tone: str, context: str, stream: bool = False,
+                     deadline: Deadline | None = None):
+    prompt = (
+        f"Write a {tone.lower()} apology message for missing a {context.lower()} obligation. "
+        "Make it sincere and appropriate. Keep it 2-3 sentences."
+    )
+    return call_openai(prompt, max_tokens=200, stream=stream, task="apology", deadline=deadline)
+
+
+def make_excuse(category: str, scenario: str, urgency: str,
+                language: str = "English", deadline: Deadline | None = None,
+                fresh: bool = False, background: bool = False) -> dict:
+    """Generate, translate and rank one excuse: ``{"text", "rank"}``.
+
+    With a *deadline* the result also lists the ``degraded`` stages;
+    ``fresh`` and ``background`` are passed to call_openai.
+    Raises GenerationError if the model call fails.
+    """
+    raw = generate_excuse(
+        category, scenario, urgency, deadline=deadline, language=language, fresh=fresh,
+        background=background,
+    )
+    if raw.startswith("❌"):
+        raise GenerationError(raw.lstrip("❌ "))
+    text = ensure_language(raw, language, deadline)
+    result = {"text": text,
+              "rank": ai_rank_excuse(text, category, scenario, deadline, background)}
+    if deadline is not None:
+        result["degraded"] = list(deadline.degraded)
+    return result
+
+
+def craft_image_prompt(proof_type: str, name: str, reason: str) -> str:
+    note = "High quality, realistic, professional. All text clearly readable in English."
+    prompts = {
+        "Hospital Certificate": (
+            f"Professional medical certificate, hospital letterhead, "
+            f"patient name '{name}', diagnosis '{reason}', doctor signature, "
+            f"hospital stamp, current date. Realistic official document layout. {note}"
+        ),
+        "WhatsApp Chat": (
+            f"WhatsApp conversation screenshot. Boss: 'Why aren't you at work today?' "
+            f"Reply from {name}: 'Sorry sir, {reason}. Will send certificate.' "
+            f"Realistic WhatsApp UI, timestamps, green bubbles. {note}"
+        ),
+        "Location Log": (
+            f"Google Maps timeline screenshot. User {name} at hospital due to {reason}. "
+            f"Red location pin, route, timestamp, realistic phone UI. {note}"
+        ),
+    }
+    return prompts.get(proof_type, f"Realistic {proof_type} document. {note}")
+
+
+@_shared
+def get_image_generator():
+    """Built once; raises ValueError (not cached) while the key is missing."""
+    from flux_ai import FluxImageGenerator
+
+    return FluxImageGenerator(settings.stability_api_key)
+
+
+def generate_proof_image(prompt: str) -> bytes:
+    with get_metrics().span("image") as span:
+        span.bytes_out = len(prompt.encode())
+        image = get_image_generator().generate_image(prompt, width=1024, height=1024)
+        buf = BytesIO()
+        image.save(buf, format="PNG")
+        span.bytes_in = buf.tell()
+        return buf.getvalue()
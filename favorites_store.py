@@ -0,0 +1,128 @@
+# favorites_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from response_cache import make_key
+
+
+class FavoritesStore:
+    """Favorites in a SQLite (WAL) table with an in-memory hash index.
+
+    Membership checks hit the index, which is rebuilt only when another
+    connection has changed the database (``PRAGMA data_version``), so
+    concurrent Streamlit sessions and processes stay consistent.  Inserts
+    and clears are single transactions.  A legacy ``favorites.txt`` is
+    imported once and renamed to ``*.migrated``.
+
+    *rankings* is an optional ``(db_path, table)`` of key → JSON label rows
+    keyed like ``hash`` (the engine's rank cache); it is attached so
+    ``page(rank_order=...)`` can sort by believability in SQL.
+    """
+
+    def __init__(self, path: str, legacy_file: str | None = None,
+                 rankings: tuple | None = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS favorites ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "hash TEXT NOT NULL UNIQUE, text TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        self._rankings = None
+        if rankings:
+            db_path, table = rankings
+            self._conn.execute("ATTACH DATABASE ? AS ranks", (db_path,))
+            self._rankings = f"ranks.{table}"
+        self._index = set()
+        self._version = None
+        if legacy_file and os.path.exists(legacy_file):
+            self._migrate(legacy_file)
+
+    def _migrate(self, legacy_file: str) -> None:
+        with open(legacy_file, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        self.add_many(lines)
+        os.replace(legacy_file, legacy_file + ".migrated")
+
+    def _sync(self) -> None:
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._version:
+            self._index = {h for (h,) in self._conn.execute("SELECT hash FROM favorites")}
+            self._version = version
+
+    def __contains__(self, text: str) -> bool:
+        with self._lock:
+            self._sync()
+            return make_key(text) in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._index)
+
+    def add(self, text: str) -> bool:
+        """Insert *text*; return False if it was already a favorite."""
+        return self.add_many([text]) == 1
+
+    def add_many(self, texts) -> int:
+        rows = [(make_key(t), t, time.time()) for t in dict.fromkeys(texts) if t]
+        with self._lock:
+            self._sync()
+            rows = [row for row in rows if row[0] not in self._index]
+            if not rows:
+                return 0
+            with self._conn:
+                cur = self._conn.executemany(
+                    "INSERT OR IGNORE INTO favorites (hash, text, created) VALUES (?, ?, ?)",
+                    rows,
+                )
+            self._index.update(h for h, _, _ in rows)
+            # data_version ignores this connection's own writes, so the
+            # index stays current without a reload.
+            return cur.rowcount
+
+    def page(self, offset: int = 0, limit: int = 50, newest_first: bool = True,
+             rank_order=None) -> list:
+        """Load one slice of favorites without reading the whole table.
+
+        With *rank_order* (labels, best first) and ``rankings`` attached,
+        favorites are sorted by label first; unranked ones come last.
+        """
+        order = "DESC" if newest_first else "ASC"
+        if rank_order and self._rankings:
+            cases = " ".join("WHEN ? THEN ?" for _ in rank_order)
+            sql = (
+                f"SELECT f.text FROM favorites f LEFT JOIN {self._rankings} r ON r.key = f.hash "
+                f"ORDER BY CASE r.value {cases} ELSE ? END, f.id {order} LIMIT ? OFFSET ?"
+            )
+            params = [value for i, label in enumerate(rank_order)
+                      for value in (json.dumps(label, ensure_ascii=False), i)]
+            params += [len(rank_order), limit, offset]
+        else:
+            sql = f"SELECT text FROM favorites ORDER BY id {order} LIMIT ? OFFSET ?"
+            params = [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [text for (text,) in rows]
+
+    def all(self) -> list:
+        """Every favorite, oldest first."""
+        with self._lock:
+            return [t for (t,) in self._conn.execute("SELECT text FROM favorites ORDER BY id")]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM favorites")
+            self._index.clear()
+
+    def compact(self) -> None:
+        """Checkpoint the WAL and reclaim space left by deletes."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
@@ -1,22 +1,17 @@
 # flux_ai.py
-import os
 import requests
 import base64
 from io import BytesIO
 from PIL import Image
-from dotenv import load_dotenv
 
-load_dotenv()
+from http_transport import get_session
+from settings import get_settings
 
 
 class FluxImageGenerator:
-    def __init__(self):
-        # Try Streamlit secrets first (cloud), then .env (local)
-        try:
-            import streamlit as st
-            self.api_key = st.secrets.get("STABILITY_API_KEY", "")
-        except Exception:
-            self.api_key = os.getenv("STABILITY_API_KEY", "")
+    def __init__(self, api_key: str | None = None):
+        settings = get_settings()
+        self.api_key = settings.stability_api_key if api_key is None else api_key
 
         if not self.api_key:
             raise ValueError(
@@ -24,10 +19,7 @@ class FluxImageGenerator:
                 "Add it to Streamlit secrets or your .env file."
             )
 
-        self.api_url = (
-            "https://api.stability.ai/v1/generation/"
-            "stable-diffusion-xl-1024-v1-0/text-to-image"
-        )
+        self.api_url = settings.stability_api_url
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Accept": "application/json",
@@ -46,7 +38,7 @@ class FluxImageGenerator:
         }
 
         try:
-            response = requests.post(
+            response = get_session().post(
                 self.api_url,
                 headers=self.headers,
                 json=payload,
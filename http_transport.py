@@ -0,0 +1,179 @@
+# http_transport.py
+"""One pooled, keep-alive HTTP session shared by every outbound call.
+
+Connections are pooled per host and reused across requests, threads and
+Streamlit sessions, so only the first request to a host pays for the
+TCP + TLS handshake.  Responses with 429/5xx are retried with jittered
+exponential backoff (honouring ``Retry-After``, but never sleeping past
+the request's own timeout); POSTs, which may bill, are only resent when
+the server refused them outright (429/503).  No request waits longer
+than the configured timeout.
+
+``route_openai()`` and ``route_deep_translator()`` point those clients at
+the shared session; gTTS and flux_ai call ``get_session()`` directly.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POST_RETRY_STATUSES = (429, 503)  # refused before running, so resending can't bill twice
+
+_config = {
+    "retries": 3,
+    "backoff": 0.5,          # seconds; doubles on every attempt
+    "jitter": 0.5,           # up to this many random seconds added per attempt
+    "pool_hosts": 10,        # distinct hosts kept in the pool manager
+    "pool_maxsize": 32,      # keep-alive connections per host
+    "timeout": 30,           # seconds, for callers that don't pass their own
+}
+_session = None
+_lock = threading.Lock()
+_local = threading.local()       # .expires: when the current request gives up; .timeout: default
+
+
+class DeadlineRetry(Retry):
+    """Retry that resends non-idempotent requests only on POST_RETRY_STATUSES
+    and caps ``Retry-After`` at what is left of the request's timeout."""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method.upper() not in Retry.DEFAULT_ALLOWED_METHODS \
+                and status_code not in POST_RETRY_STATUSES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response) -> float | None:
+        seconds = super().get_retry_after(response)
+        expires = getattr(_local, "expires", None)
+        if seconds is None or expires is None:
+            return seconds
+        return max(0.0, min(seconds, expires - time.monotonic()))
+
+
+class SharedSession(requests.Session):
+    """A Session that ignores ``close()`` from clients that think they own it
+    and applies a default timeout to requests that have none."""
+
+    def close(self) -> None:
+        pass
+
+    def send(self, request, **kwargs):
+        # deep_translator never passes a timeout; don't let it hang.
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = getattr(_local, "timeout", None) or _config["timeout"]
+        timeout = kwargs["timeout"]
+        if isinstance(timeout, tuple):           # (connect, read)
+            timeout = max((t for t in timeout if t), default=_config["timeout"])
+        # Callers pass what is left of their deadline as the timeout, so
+        # DeadlineRetry sleeps no longer than that for Retry-After.
+        _local.expires = time.monotonic() + timeout
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            _local.expires = None
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+def configure(**options) -> None:
+    """Override retry/pool settings; applies to the next ``get_session()``."""
+    global _session
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Unknown transport options: {', '.join(sorted(unknown))}")
+    with _lock:
+        _config.update(options)
+        if _session is not None:
+            _session.shutdown()
+            _session = None
+
+
+@contextmanager
+def default_timeout(seconds: float):
+    """Give this thread's requests without a timeout of their own *seconds* instead."""
+    previous = getattr(_local, "timeout", None)
+    _local.timeout = seconds
+    try:
+        yield
+    finally:
+        _local.timeout = previous
+
+
+def _build() -> SharedSession:
+    retry = DeadlineRetry(
+        total=_config["retries"],
+        connect=_config["retries"],
+        read=0,
+        status=_config["retries"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,            # LLM/image POSTs too, limited by DeadlineRetry
+        backoff_factor=_config["backoff"],
+        backoff_jitter=_config["jitter"],
+        respect_retry_after_header=True,
+        raise_on_status=False,           # hand the last response to the caller
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_config["pool_hosts"],
+        pool_maxsize=_config["pool_maxsize"],
+        max_retries=retry,
+    )
+    session = SharedSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> SharedSession:
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build()
+        return _session
+
+
+class _RequestsShim:
+    """Stands in for the ``requests`` module inside deep_translator."""
+
+    def __getattr__(self, name):
+        if name in ("get", "post", "request"):
+            return getattr(get_session(), name)
+        return getattr(requests, name)
+
+
+def route_openai(openai) -> None:
+    """Make the openai 0.28 client send through the shared session."""
+    openai.requestssession = get_session()
+
+
+def route_deep_translator() -> None:
+    """deep_translator calls ``requests.get`` directly; swap in the session."""
+    from deep_translator import google
+
+    google.requests = _RequestsShim()
+
+
+def pool_stats() -> list:
+    """Per-host connection pool counters."""
+    stats = []
+    with _lock:
+        if _session is None:
+            return stats
+        adapters = {id(a): a for a in _session.adapters.values()}.values()
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats.append({
+                "host": f"{key.key_scheme}://{key.key_host}:{key.key_port}",
+                "connections": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": sum(conn is not None for conn in pool.pool.queue) if pool.pool else 0,
+            })
+    return stats
@@ -0,0 +1,80 @@
+# jobs.py
+import threading
+import time
+import uuid
+
+
+class Job:
+    """One unit of background work and its outcome."""
+
+    def __init__(self, kind: str, meta: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.meta = meta or {}
+        self.status = "queued"          # queued → running → done | error
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class JobManager:
+    """Process-wide registry of background jobs.
+
+    Work runs via ``submit(fn, *args)`` (an executor-style callable), so
+    the caller decides the worker pool.  Sessions keep only job ids, which
+    survive reruns; finished jobs are dropped after ``ttl`` seconds.
+    """
+
+    def __init__(self, submit, ttl: float = 3600):
+        self.submit_fn = submit
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, *args, meta: dict | None = None) -> str:
+        job = Job(kind, meta)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self.submit_fn(self._run, job, fn, args)
+        return job.id
+
+    def _run(self, job: Job, fn, args) -> None:
+        job.status, job.started = "running", time.time()
+        try:
+            job.result = fn(*args)
+            job.status = "done"
+        except Exception as exc:
+            job.error = exc
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {"queued": 0, "running": 0, "done": 0, "error": 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return counts
@@ -0,0 +1,63 @@
+# language_check.py
+"""Fast, offline check that a text is written in the language we asked for.
+
+Hindi, Tamil and Telugu each have their own Unicode block, so the share of
+letters in that block decides.  Spanish and English share the Latin
+script and are told apart by their most common function words.  Only the
+languages in the app's ``LANGUAGE_CODES`` are known.
+
+    is_language("Lo siento, el autobús se averió esta mañana.", "es")  # True
+"""
+import re
+
+SCRIPTS = {                      # language code → Unicode block
+    "hi": (0x0900, 0x097F),      # Devanagari
+    "ta": (0x0B80, 0x0BFF),      # Tamil
+    "te": (0x0C00, 0x0C7F),      # Telugu
+}
+STOPWORDS = {
+    "en": frozenset(
+        "the and to of a i my was is in it that for on but so have be with you this at "
+        "had not me will as could would been were".split()
+    ),
+    "es": frozenset(
+        "el la los las de que y en un una mi por con para se no es lo al del pero muy "
+        "me su porque fue estaba esta hoy como más".split()
+    ),
+}
+SCRIPT_SHARE = 0.6               # letters that must be in the expected block
+LATIN_SHARE = 0.9                # Latin letters needed before stopwords are compared
+MIN_STOPWORDS = 2                # function-word hits needed for a Latin-script verdict
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def _letters(text: str) -> list:
+    return [c for c in text if c.isalpha()]
+
+
+def script_share(text: str, code: str) -> float:
+    """Fraction of *text*'s letters inside *code*'s Unicode block."""
+    letters = _letters(text)
+    if not letters:
+        return 0.0
+    low, high = SCRIPTS[code]
+    return sum(low <= ord(c) <= high for c in letters) / len(letters)
+
+
+def _stopword_hits(text: str) -> dict:
+    words = _WORD.findall(text.lower())
+    return {code: sum(w in vocab for w in words) for code, vocab in STOPWORDS.items()}
+
+
+def is_language(text: str, code: str) -> bool:
+    """True if *text* reads as language *code* (one of LANGUAGE_CODES' values)."""
+    if code in SCRIPTS:
+        return script_share(text, code) >= SCRIPT_SHARE
+    letters = _letters(text)
+    latin = sum(c.isascii() or "À" <= c <= "ɏ" for c in letters)
+    if not letters or latin < LATIN_SHARE * len(letters):
+        return False
+    hits = _stopword_hits(text)
+    best = max(hits, key=hits.get)
+    return best == code and hits[code] >= MIN_STOPWORDS
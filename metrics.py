@@ -0,0 +1,290 @@
+# metrics.py
+"""Per-stage timing spans, latency histograms and their export.
+
+    with metrics.span("translate", target="hi") as span:
+        span.cache = "miss"
+        span.bytes_out = len(text)
+        ...
+
+Every finished span is folded into a per-stage histogram and counters,
+appended to a JSON-lines log, and kept in a short in-memory ring for the
+sidebar panel.  ``prometheus_text()`` renders everything in the Prometheus
+text format; it is written to a file every ``export_interval`` seconds and
+can also be served over HTTP with ``serve(port)``.
+
+``python metrics.py metrics.jsonl`` summarises a log per stage.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Upper bounds in seconds; chosen around the app's stages (cache hits in
+# ms, LLM calls in seconds, image generation in tens of seconds).
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, as Prometheus models them."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the *q* quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen, lower = 0, 0.0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            if count and seen + count >= target:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (target - seen) / count
+            seen += count
+            lower = bound
+        return lower
+
+
+class Span:
+    """One timed stage; callers fill in what they know before it closes."""
+
+    def __init__(self, stage: str, labels: dict):
+        self.stage = stage
+        self.labels = labels
+        self.started = time.time()
+        self.duration = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cache = None        # "hit", "miss", or None when not cached
+        self.error = None        # exception class name
+
+    def fail(self, exc: BaseException) -> None:
+        """Record an error that the caller handles instead of raising."""
+        self.error = type(exc).__name__
+
+    def to_dict(self) -> dict:
+        record = {
+            "ts": round(self.started, 3),
+            "stage": self.stage,
+            "ms": round(self.duration * 1000, 2),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "cache": self.cache,
+            "error": self.error,
+        }
+        record.update(self.labels)
+        return record
+
+
+class Metrics:
+    """Thread-safe registry of spans, shared by every session in a process."""
+
+    def __init__(self, prom_path: str | None = None, log_path: str | None = None,
+                 export_interval: float = 10.0, log_max_bytes: int = 20 * 1024 * 1024,
+                 recent: int = 200):
+        self.prom_path = prom_path
+        self.log_path = log_path
+        self.export_interval = export_interval
+        self.log_max_bytes = log_max_bytes
+        self.histograms = defaultdict(Histogram)
+        self.calls = defaultdict(int)      # (stage, cache, outcome) → count
+        self.errors = defaultdict(int)     # (stage, error class) → count
+        self.bytes = defaultdict(int)      # (stage, "in" | "out") → bytes
+        self.recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._log = None
+        self._exported = 0.0
+        self._server = None
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        span = Span(stage, labels)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as exc:
+            span.fail(exc)
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            self.record(span)
+
+    def record(self, span: Span) -> None:
+        outcome = "error" if span.error else "ok"
+        with self._lock:
+            self.histograms[span.stage].observe(span.duration)
+            self.calls[(span.stage, span.cache or "", outcome)] += 1
+            if span.error:
+                self.errors[(span.stage, span.error)] += 1
+            self.bytes[(span.stage, "in")] += span.bytes_in
+            self.bytes[(span.stage, "out")] += span.bytes_out
+            self.recent.append(span)
+            export = self.prom_path and time.monotonic() - self._exported >= self.export_interval
+            if export:
+                self._exported = time.monotonic()
+            # Telemetry must never fail the stage it measures.
+            try:
+                if self.log_path:
+                    self._write_log(span)
+            except OSError:
+                pass
+        if export:
+            try:
+                self.export()
+            except OSError:
+                pass
+
+    def _write_log(self, span: Span) -> None:
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        elif self._log.tell() >= self.log_max_bytes:
+            self._log.close()
+            os.replace(self.log_path, self.log_path + ".1")
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log.write(json.dumps(span.to_dict(), ensure_ascii=False) + "\n")
+        self._log.flush()
+
+    # ── reading ─────────────────────────────
+    def summary(self) -> list:
+        """Per-stage rows for display: calls, errors, hit rate, latency."""
+        with self._lock:
+            stages = sorted(self.histograms)
+            rows = []
+            for stage in stages:
+                hist = self.histograms[stage]
+                hits = sum(n for (s, c, _), n in self.calls.items() if s == stage and c == "hit")
+                misses = sum(n for (s, c, _), n in self.calls.items() if s == stage and c == "miss")
+                errors = sum(n for (s, _), n in self.errors.items() if s == stage)
+                rows.append({
+                    "stage": stage,
+                    "calls": hist.count,
+                    "errors": errors,
+                    "hit_rate": hits / (hits + misses) if hits + misses else None,
+                    "p50_ms": hist.quantile(0.5) * 1000,
+                    "p95_ms": hist.quantile(0.95) * 1000,
+                    "mean_ms": hist.sum / hist.count * 1000,
+                })
+        return rows
+
+    def recent_spans(self, limit: int = 10) -> list:
+        with self._lock:
+            return [span.to_dict() for span in list(self.recent)[-limit:]][::-1]
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP excuse_stage_seconds Duration of each pipeline stage.",
+            "# TYPE excuse_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip((*hist.buckets, "+Inf"), hist.counts):
+                    cumulative += count
+                    lines.append(
+                        f'excuse_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'excuse_stage_seconds_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'excuse_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+            lines += [
+                "# HELP excuse_stage_total Finished stages by cache result and outcome.",
+                "# TYPE excuse_stage_total counter",
+            ]
+            for (stage, cache, outcome), count in sorted(self.calls.items()):
+                lines.append(
+                    f'excuse_stage_total{{stage="{stage}",cache="{cache}",'
+                    f'outcome="{outcome}"}} {count}'
+                )
+            lines += [
+                "# HELP excuse_stage_errors_total Failed stages by exception class.",
+                "# TYPE excuse_stage_errors_total counter",
+            ]
+            for (stage, error), count in sorted(self.errors.items()):
+                lines.append(
+                    f'excuse_stage_errors_total{{stage="{stage}",error="{error}"}} {count}'
+                )
+            lines += [
+                "# HELP excuse_stage_bytes_total Payload bytes sent (out) and received (in).",
+                "# TYPE excuse_stage_bytes_total counter",
+            ]
+            for (stage, direction), count in sorted(self.bytes.items()):
+                lines.append(
+                    f'excuse_stage_bytes_total{{stage="{stage}",direction="{direction}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+    # ── export ──────────────────────────────
+    def export(self, path: str | None = None) -> None:
+        """Atomically (re)write the Prometheus text file."""
+        path = path or self.prom_path
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> None:
+        """Serve ``/metrics`` from a daemon thread (idempotent)."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        if self._server is not None:
+            return
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+
+def summarize_log(path: str) -> list:
+    """Rebuild per-stage rows from a JSON-lines span log."""
+    metrics = Metrics()
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            record = json.loads(line)
+            span = Span(record["stage"], {})
+            span.duration = record["ms"] / 1000
+            span.cache = record.get("cache")
+            span.error = record.get("error")
+            metrics.record(span)
+    return metrics.summary()
+
+
+if __name__ == "__main__":
+    log = sys.argv[1] if len(sys.argv) > 1 else "metrics.jsonl"
+    print(f"{'stage':<14}{'calls':>7}{'errors':>8}{'hit rate':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    for row in summarize_log(log):
+        hit_rate = "-" if row["hit_rate"] is None else f"{row['hit_rate']:.0%}"
+        print(f"{row['stage']:<14}{row['calls']:>7}{row['errors']:>8}{hit_rate:>10}"
+              f"{row['p50_ms']:>9.0f}{row['p95_ms']:>9.0f}")
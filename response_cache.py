@@ -0,0 +1,251 @@
+# response_cache.py
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SQL_BATCH = 500                  # keys per "IN (...)" lookup, under SQLite's bound-parameter cap
+TRIM_EVERY = 100                 # writes between size checks on a capped SQLiteStore
+
+
+def make_key(*parts) -> str:
+    """Stable SHA-256 key for any JSON-serialisable parts."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-memory LRU with per-entry TTL."""
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteStore:
+    """Persistent key → JSON value table that survives restarts.
+
+    With ``max_entries`` set, the table is trimmed first-in, first-out:
+    every TRIM_EVERY writes, the oldest-written rows past that size are
+    deleted (reads don't refresh a row), so it may briefly run over.
+    """
+
+    def __init__(self, path: str, table: str = "responses", ttl: float | None = None,
+                 max_entries: int | None = None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            if max_entries:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_created ON {table} (created)"
+                )
+        self._writes = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return default
+        value, created = row
+        if self.ttl is not None and created + self.ttl < time.time():
+            self.delete(key)
+            return default
+        return json.loads(value)
+
+    def get_many(self, keys) -> dict:
+        """``{key: value}`` for those of *keys* that are stored, in batched queries."""
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), SQL_BATCH):
+                chunk = keys[start:start + SQL_BATCH]
+                rows += self._conn.execute(
+                    f"SELECT key, value, created FROM {self.table} "
+                    f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+        now = time.time()
+        return {key: json.loads(value) for key, value, created in rows
+                if self.ttl is None or created + self.ttl >= now}
+
+    def set(self, key, value) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+            self._writes += 1
+            if self.max_entries and self._writes % TRIM_EVERY == 0:
+                self._trim()
+
+    def _trim(self) -> None:
+        excess = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess -= self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY created LIMIT ?)",
+                (excess,),
+            )
+
+    def delete(self, key) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TwoTierCache:
+    """In-memory LRU in front of a SQLite table, with hit/miss counters."""
+
+    def __init__(self, path: str, table: str, maxsize: int = 256, ttl: float | None = 3600,
+                 max_entries: int | None = None):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.disk = SQLiteStore(path, table=table, ttl=ttl, max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _lookup(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value, "memory"
+        value = self.disk.get(key)
+        if value is not None:
+            self.memory.set(key, value)
+            return value, "disk"
+        return None, None
+
+    def peek(self, key, default=None):
+        """Look up *key* without touching the hit/miss counters."""
+        value, _ = self._lookup(key)
+        return default if value is None else value
+
+    def peek_many(self, keys) -> dict:
+        """``{key: value}`` for those of *keys* that are cached, counters untouched.
+
+        Memory is checked first and the rest are read from disk together;
+        disk hits are not promoted, so a long list can't flush the LRU.
+        """
+        keys, found = list(keys), {}
+        for key in keys:
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+        found.update(self.disk.get_many(key for key in keys if key not in found))
+        return found
+
+    def get(self, key, default=None):
+        value, tier = self._lookup(key)
+        if value is None:
+            self._count("misses")
+            return default
+        self._count(f"{tier}_hits")
+        return value
+
+    def set(self, key, value) -> None:
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+
+class ResponseCache(TwoTierCache):
+    """LLM completion cache keyed on (model, prompt, temperature, max_tokens).
+
+    Each key holds up to ``variants`` sampled completions.  Until that many
+    have been collected a lookup counts as a miss so the caller fetches a
+    fresh one; afterwards a random cached variant is served, which keeps
+    repeat users from seeing the same excuse every time.
+    """
+
+    def __init__(self, path: str, maxsize: int = 512, ttl: float | None = 7 * 24 * 3600,
+                 variants: int = 3):
+        super().__init__(path, table="responses", maxsize=maxsize, ttl=ttl)
+        self.variants = max(1, variants)
+
+    @staticmethod
+    def key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        return make_key(model, prompt, round(float(temperature), 3), int(max_tokens))
+
+    def lookup(self, key) -> str | None:
+        cached, tier = self._lookup(key)
+        if not cached or len(cached) < self.variants:
+            self._count("misses")
+            return None
+        self._count(f"{tier}_hits")
+        return random.choice(cached)
+
+    def store(self, key, text: str) -> None:
+        cached, _ = self._lookup(key)
+        cached = list(cached or [])
+        cached.append(text)
+        self.set(key, cached[-self.variants:])
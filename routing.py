@@ -0,0 +1,224 @@
+# routing.py
+"""Per-task model lists, rolling latency profiles and hedged requests.
+
+    router = Router({"excuse": ["model-a", "model-b"]})
+    text, model = router.call("excuse", lambda model: request(model))
+
+Each task's healthiest model is asked first.  If it hasn't answered by
+its own rolling p95 latency, the next model is asked as well and the
+first success wins; if it fails, the next model takes over at once.  The
+slower request is left to finish in the background; it is recorded in
+its model's profile as taking at least as long as it had when it lost,
+so a provider that turns slow or flaky drops down the order until it
+recovers.  With ``probe_every``, every Nth call keeps the
+configured order, so a demoted model is still sampled when nothing else
+would ever hedge to it.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MIN_SAMPLES = 5                  # below this a profile falls back to the default hedge delay
+
+
+class ModelProfile:
+    """Rolling window of one model's latencies and failures for one task."""
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)   # (seconds, ok)
+        self.wins = 0                          # calls this model answered
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.samples.append((seconds, ok))
+
+    def quantile(self, q: float) -> float | None:
+        """Nearest-rank quantile of successful latencies, or None if too few."""
+        latencies = sorted(seconds for seconds, ok in self.samples if ok)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[max(1, math.ceil(q * len(latencies))) - 1]
+
+    def error_rate(self) -> float:
+        if len(self.samples) < MIN_SAMPLES:
+            return 0.0
+        return sum(not ok for _, ok in self.samples) / len(self.samples)
+
+
+class Router:
+    """Routes each task's requests across its models, hedging slow ones.
+
+    ``routes`` maps a task name to its models in order of preference.
+    ``fetch(model)`` performs one request; exceptions listed in
+    ``neutral`` (e.g. local throttling) are raised without counting
+    against the model.
+    """
+
+    def __init__(self, routes: dict, window: int = 100, hedge_delay: float = 4.0,
+                 min_hedge_delay: float = 0.25, max_hedge_delay: float | None = None,
+                 timeout: float = 45.0,
+                 max_error_rate: float = 0.5, slow_factor: float = 3.0,
+                 probe_every: int | None = None, workers: int = 16, neutral: tuple = ()):
+        self.routes = {task: list(models) for task, models in routes.items()}
+        self.window = window
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.timeout = timeout
+        self.max_error_rate = max_error_rate
+        self.slow_factor = slow_factor
+        self.probe_every = probe_every
+        self.neutral = neutral
+        self.profiles = {}               # (task, model, stream) → ModelProfile
+        self.counters = {"calls": 0, "hedged": 0, "backup_wins": 0, "failovers": 0,
+                         "timeouts": 0, "failed": 0}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="route")
+        self._lock = threading.Lock()
+
+    def _profile(self, task: str, model: str, stream: bool) -> ModelProfile:
+        key = (task, model, stream)
+        if key not in self.profiles:
+            self.profiles[key] = ModelProfile(self.window)
+        return self.profiles[key]
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    # ── routing decisions ───────────────────
+    def models(self, task: str, stream: bool = False) -> list:
+        """*task*'s models, best first: erroring or much slower ones sink,
+        as do ones whose p95 is past ``max_hedge_delay``."""
+        models = self.routes[task]
+        with self._lock:
+            p95 = {m: self._profile(task, m, stream).quantile(0.95) for m in models}
+            errors = {m: self._profile(task, m, stream).error_rate() for m in models}
+        known = [value for value in p95.values() if value is not None]
+        fastest = min(known) if known else None
+
+        def demoted(model):
+            if errors[model] > self.max_error_rate:
+                return 2
+            if p95[model] is None:
+                return 0
+            if self.max_hedge_delay is not None and p95[model] > self.max_hedge_delay:
+                return 1
+            return 1 if p95[model] > self.slow_factor * fastest else 0
+
+        return sorted(models, key=lambda m: (demoted(m), models.index(m)))
+
+    def hedge_after(self, task: str, model: str, stream: bool = False) -> float:
+        """Seconds to wait on *model* before also asking the next one."""
+        with self._lock:
+            p95 = self._profile(task, model, stream).quantile(0.95)
+        delay = max(self.min_hedge_delay, self.hedge_delay if p95 is None else p95)
+        return delay if self.max_hedge_delay is None else min(delay, self.max_hedge_delay)
+
+    # ── calling ─────────────────────────────
+    def _attempt(self, task: str, model: str, stream: bool, fetch, attempt: dict):
+        try:
+            result = fetch(model)
+        except self.neutral:
+            raise
+        except Exception:
+            self._record(task, model, stream, attempt, False)
+            raise
+        self._record(task, model, stream, attempt, True)
+        return result
+
+    def _record(self, task: str, model: str, stream: bool, attempt: dict, ok: bool) -> None:
+        """Record one attempt's latency, once: when it ends or when it loses."""
+        with self._lock:
+            if not attempt["recorded"]:
+                attempt["recorded"] = True
+                seconds = time.perf_counter() - attempt["start"]
+                self._profile(task, model, stream).record(seconds, ok)
+
+    def call(self, task: str, fetch, stream: bool = False, discard=None,
+             timeout: float | None = None) -> tuple:
+        """Return ``(result, model)`` from the first of *task*'s models to succeed.
+
+        ``discard(result)`` is called on results that lose the race, e.g.
+        to close a stream.  Raises the last model error if every model
+        fails, or TimeoutError if none answers within *timeout* (at most
+        the router's own).
+        """
+        with self._lock:
+            self.counters["calls"] += 1
+            probe = self.probe_every and self.counters["calls"] % self.probe_every == 0
+        models = self.routes[task] if probe else self.models(task, stream)
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        deadline = time.monotonic() + timeout
+        pending, last_error, next_model = {}, None, 0
+
+        def launch() -> float:
+            nonlocal next_model
+            model = models[next_model]
+            next_model += 1
+            attempt = {"start": time.perf_counter(), "recorded": False}
+            future = self._pool.submit(self._attempt, task, model, stream, fetch, attempt)
+            pending[future] = (model, attempt)
+            return time.monotonic() + self.hedge_after(task, model, stream)
+
+        hedge_at = launch()
+        while pending:
+            spare = next_model < len(models)
+            until = min(deadline, hedge_at) if spare else deadline
+            done, _ = wait(pending, timeout=max(0.0, until - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                model, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    last_error = exc
+                    continue
+                self._abandon(task, stream, pending, discard)
+                with self._lock:
+                    self._profile(task, model, stream).wins += 1
+                if model != models[0]:
+                    self._bump("backup_wins")
+                return result, model
+            if time.monotonic() >= deadline:
+                self._abandon(task, stream, pending, discard)
+                self._bump("timeouts")
+                raise TimeoutError(f"No model answered '{task}' within {timeout:.1f}s")
+            if spare and (not pending or time.monotonic() >= hedge_at):
+                self._bump("hedged" if pending else "failovers")
+                hedge_at = launch()
+        self._bump("failed")
+        raise last_error
+
+    def _abandon(self, task: str, stream: bool, pending: dict, discard) -> None:
+        """Let losing attempts finish in the background, discarding results."""
+        for future, (model, attempt) in pending.items():
+            self._record(task, model, stream, attempt, True)
+            if discard is not None:
+                future.add_done_callback(
+                    lambda f: f.exception() is None and discard(f.result())
+                )
+
+    # ── reading ─────────────────────────────
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def profile_rows(self) -> list:
+        """Per (task, model) latency and error rows for display."""
+        rows = []
+        with self._lock:
+            for (task, model, stream), profile in sorted(self.profiles.items()):
+                if not profile.samples:
+                    continue
+                p50, p95 = profile.quantile(0.5), profile.quantile(0.95)
+                rows.append({
+                    "task": task + (" (first token)" if stream else ""),
+                    "model": model,
+                    "samples": len(profile.samples),
+                    "wins": profile.wins,
+                    "p50_ms": None if p50 is None else p50 * 1000,
+                    "p95_ms": None if p95 is None else p95 * 1000,
+                    "error_rate": profile.error_rate(),
+                })
+        return rows
@@ -0,0 +1,44 @@
+# settings.py
+import os
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Settings:
+    openrouter_api_key: str = ""
+    stability_api_key: str = ""
+    openrouter_api_base: str = "https://openrouter.ai/api/v1"
+    stability_api_url: str = (
+        "https://api.stability.ai/v1/generation/"
+        "stable-diffusion-xl-1024-v1-0/text-to-image"
+    )
+
+
+def _secret(key: str, default: str = "") -> str:
+    """Try Streamlit secrets first (cloud), then the environment / .env.
+
+    Secrets are only consulted inside the app; headless callers (batch.py)
+    never import Streamlit.
+    """
+    st = sys.modules.get("streamlit")
+    try:
+        return st.secrets[key]
+    except Exception:
+        return os.getenv(key, default)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Resolve configuration once per process."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    defaults = Settings()
+    return Settings(
+        openrouter_api_key=_secret("OPENROUTER_API_KEY"),
+        stability_api_key=_secret("STABILITY_API_KEY"),
+        openrouter_api_base=_secret("OPENROUTER_API_BASE", defaults.openrouter_api_base),
+        stability_api_url=_secret("STABILITY_API_URL", defaults.stability_api_url),
+    )
@@ -0,0 +1,36 @@
+# tests/test_parse_candidates.py
+from excuse_engine import parse_candidates
+
+
+def test_plain_numbered_list():
+    assert parse_candidates("1. A\n2) B\n3. C") == ["A", "B", "C"]
+
+
+def test_preamble_before_first_number_is_dropped():
+    text = "Here are 3 excuses:\n1. A\n2. B\n3. C"
+    assert parse_candidates(text) == ["A", "B", "C"]
+
+
+def test_bold_numbers():
+    assert parse_candidates("**1.** A\n**2.** B") == ["A", "B"]
+
+
+def test_dash_numbers():
+    assert parse_candidates("1 - A\n2 - B") == ["A", "B"]
+
+
+def test_wrapped_lines_join_their_excuse():
+    assert parse_candidates("1. Train was\ncancelled.\n2. B") == ["Train was cancelled.", "B"]
+
+
+def test_times_are_not_numbers():
+    text = "1. The meeting moved to\n3:30 without notice.\n2. B"
+    assert parse_candidates(text) == ["The meeting moved to 3:30 without notice.", "B"]
+
+
+def test_unnumbered_text_is_one_candidate():
+    assert parse_candidates('"Sorry, my bus\nbroke down."') == ["Sorry, my bus broke down."]
+
+
+def test_quotes_bold_and_duplicates_are_stripped():
+    assert parse_candidates('1. "A"\n2. **A**\n3. B') == ["A", "B"]
@@ -0,0 +1,146 @@
+# throttle.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class ThrottledError(RuntimeError):
+    """Raised when a request waits longer than the gate's queue timeout."""
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float | None = None, reserve: float = 0) -> float:
+        """Take one token, sleeping as needed; return the seconds waited.
+
+        With a *reserve*, wait until that many tokens would still be left,
+        keeping them for callers that don't pass one.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1 + reserve:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 + reserve - self._tokens) / self.rate
+            if deadline is not None and now + delay > deadline:
+                raise ThrottledError("Rate limit queue timed out")
+            time.sleep(delay)
+            waited += delay
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class UpstreamGate:
+    """Process-wide guard in front of one upstream API.
+
+    * single-flight: concurrent calls with the same key share one upstream
+      request and all receive its result (or exception);
+    * a token bucket caps the request rate, keeping ``reserve`` of its
+      burst for interactive calls: ``slot(background=True)`` can't take it;
+    * a semaphore caps requests in flight.
+
+    ``stats()`` reports queued/coalesced/throttled counts.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int,
+                 queue_timeout: float = 30.0, reserve: int = 0):
+        self.bucket = TokenBucket(rate, burst)
+        self.queue_timeout = queue_timeout
+        self.reserve = min(reserve, burst - 1)
+        # Shared requests run here, so none is cut short by one caller's timeout.
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="flight")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "upstream": 0, "coalesced": 0, "throttled": 0,
+                         "queued": 0, "in_flight": 0, "rejected": 0}
+
+    def _bump(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += delta
+
+    @contextmanager
+    def slot(self, timeout: float | None = None, background: bool = False):
+        """Hold one rate-limited, concurrency-capped upstream slot.
+
+        Waits at most *timeout* (default: the gate's queue timeout).
+        *background* calls (prefetch, refills) leave the reserved burst to
+        interactive ones.
+        """
+        timeout = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        self._bump("queued")
+        try:
+            try:
+                waited = self.bucket.acquire(timeout, self.reserve if background else 0)
+            except ThrottledError:
+                self._bump("rejected")
+                raise
+            if waited:
+                self._bump("throttled")
+            if not self._slots.acquire(timeout=max(0.0, timeout - waited)):
+                self._bump("rejected")
+                raise ThrottledError("Too many concurrent upstream requests")
+        finally:
+            self._bump("queued", -1)
+        self._bump("in_flight")
+        self._bump("upstream")
+        try:
+            yield
+        finally:
+            self._bump("in_flight", -1)
+            self._slots.release()
+
+    def coalesce(self, key, fn, timeout: float | None = None):
+        """Run ``fn()`` once per in-flight *key*; it takes its own slots, e.g. one per hedge.
+
+        ``fn()`` runs on the gate's pool and always to completion; every
+        caller, the first included, waits at most its own *timeout*.
+        """
+        self._bump("calls")
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.counters["coalesced"] += 1
+        if leader:
+            self._pool.submit(self._fly, key, flight, fn)
+        if not flight.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for the upstream request")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _fly(self, key, flight: _Flight, fn) -> None:
+        try:
+            flight.result = fn()
+        except Exception as exc:
+            flight.error = exc
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,129 @@
+# tts_backends.py
+"""Text-to-speech engines behind one interface.
+
+    backend = EspeakBackend()
+    if backend.available():
+        mp3 = backend.synthesize("माफ़ कीजिए, मैं देर से आऊँगा।", "hi")
+
+Every backend turns ``(text, lang_code, slow, timeout)`` into MP3 bytes,
+so the audio cache and ``st.audio`` don't care which one spoke.
+``GTTSBackend`` calls Google's endpoint; ``EspeakBackend`` runs espeak-ng
+locally and encodes its WAV with ffmpeg, so it works without a network.
+"""
+import base64
+import re
+import shutil
+import subprocess
+import threading
+from io import BytesIO
+
+_GTTS_AUDIO = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+class BackendBusy(RuntimeError):
+    """The backend is at capacity; try another rather than queueing."""
+
+
+class GTTSBackend:
+    """Google Translate's TTS endpoint via gTTS, chunks fetched in parallel.
+
+    gTTS splits text into ~100-character chunks and fetches them one by
+    one, each on a fresh ``requests.Session``.  This sends the same
+    prepared requests through *session* on *pool* and joins the MP3
+    chunks in order, so long text takes about as long as its slowest chunk.
+    Past *max_clips* clips in flight it raises BackendBusy instead of
+    queueing behind a slow endpoint (None: no limit).
+    """
+
+    name = "gtts"
+
+    def __init__(self, session, pool, max_clips: int | None = None):
+        self.session = session
+        self.pool = pool
+        self._slots = threading.BoundedSemaphore(max_clips) if max_clips else None
+
+    def available(self) -> bool:
+        return True
+
+    def synthesize(self, text: str, lang_code: str, slow: bool = False,
+                   timeout: float | None = None) -> bytes:
+        if self._slots is None:
+            return self._synthesize(text, lang_code, slow, timeout)
+        if not self._slots.acquire(blocking=False):
+            raise BackendBusy("gTTS has too many clips in flight")
+        try:
+            return self._synthesize(text, lang_code, slow, timeout)
+        finally:
+            self._slots.release()
+
+    def _synthesize(self, text: str, lang_code: str, slow: bool,
+                    timeout: float | None) -> bytes:
+        from gtts import gTTS
+
+        prepared = gTTS(text=text, lang=lang_code, slow=slow)._prepare_requests()
+        if len(prepared) == 1:
+            chunks = [self._fetch(prepared[0], timeout)]
+        else:
+            futures = [self.pool.submit(self._fetch, request, timeout) for request in prepared]
+            try:
+                chunks = [future.result() for future in futures]
+            except Exception:
+                for future in futures:       # don't queue work for a clip that failed
+                    future.cancel()
+                raise
+        return b"".join(chunks)
+
+    def _fetch(self, request, timeout: float | None) -> bytes:
+        response = self.session.send(request, timeout=timeout)
+        response.raise_for_status()
+        buf = BytesIO()
+        for line in response.iter_lines(chunk_size=1024):
+            match = _GTTS_AUDIO.search(line.decode("utf-8"))
+            if match:
+                buf.write(base64.b64decode(match.group(1).encode("ascii")))
+        if not buf.tell():
+            # A missing chunk would leave a truncated clip; fail so the
+            # router tries another backend and nothing partial is cached.
+            raise RuntimeError("TTS API returned no audio for a chunk.")
+        return buf.getvalue()
+
+
+class EspeakBackend:
+    """espeak-ng, fully offline; robotic next to gTTS but fast and always there.
+
+    Needs the ``espeak-ng`` and ``ffmpeg`` binaries (see packages.txt).
+    """
+
+    name = "espeak"
+    VOICES = {"en": "en-us", "hi": "hi", "ta": "ta", "te": "te", "es": "es"}
+
+    def __init__(self, binary: str = "espeak-ng", ffmpeg: str = "ffmpeg",
+                 words_per_minute: int = 165):
+        self.binary = binary
+        self.ffmpeg = ffmpeg
+        self.words_per_minute = words_per_minute
+
+    def available(self) -> bool:
+        return bool(shutil.which(self.binary) and shutil.which(self.ffmpeg))
+
+    def synthesize(self, text: str, lang_code: str, slow: bool = False,
+                   timeout: float | None = None) -> bytes:
+        speed = self.words_per_minute * 2 // 3 if slow else self.words_per_minute
+        wav = self._run(
+            [self.binary, "-v", self.VOICES.get(lang_code, lang_code), "-s", str(speed),
+             "--stdin", "--stdout"],
+            text.encode("utf-8"), timeout,
+        )
+        return self._run(
+            [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+             "-f", "mp3", "pipe:1"],
+            wav, timeout,
+        )
+
+    @staticmethod
+    def _run(command: list, data: bytes, timeout: float | None) -> bytes:
+        proc = subprocess.run(command, input=data, capture_output=True, timeout=timeout)
+        if proc.returncode or not proc.stdout:
+            error = proc.stderr.decode("utf-8", "replace").strip() or "no output"
+            raise RuntimeError(f"{command[0]} failed: {error}")
+        return proc.stdout
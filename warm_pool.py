@@ -0,0 +1,123 @@
+# warm_pool.py
+import json
+import sqlite3
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces calls at least ``60 / per_minute`` seconds apart (blocking)."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+        if delay:
+            time.sleep(delay)
+
+
+class WarmPool:
+    """Persistent pool of ready-made excuses per sidebar combination.
+
+    ``producer(combo)`` builds one payload (a JSON-serialisable dict) for a
+    combination tuple such as ``("Work", "Late to Class", "Low", "Hindi")``.
+    ``take`` pops a payload instantly if one is ready; ``refill`` tops a
+    combination back up to ``depth`` in the background via ``submit(fn, *args)``,
+    whose executor bounds refill concurrency, calling the producer no
+    faster than ``rate_per_minute`` overall.
+    """
+
+    def __init__(self, path: str, producer, submit, depth: int = 3,
+                 rate_per_minute: float = 30):
+        self.producer = producer
+        self.submit = submit
+        self.depth = depth
+        self._limiter = RateLimiter(rate_per_minute)
+        self._lock = threading.Lock()
+        self._refilling = set()
+        self.counters = {"hits": 0, "misses": 0, "produced": 0, "errors": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS warm_pool ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, combo TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS warm_pool_combo ON warm_pool (combo)")
+
+    @staticmethod
+    def _combo_key(combo) -> str:
+        return "|".join(combo)
+
+    def size(self, combo) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM warm_pool WHERE combo = ?", (self._combo_key(combo),)
+            ).fetchone()[0]
+
+    def take(self, combo) -> dict | None:
+        """Pop the oldest ready payload for *combo*, or None if the pool is dry."""
+        key = self._combo_key(combo)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, payload FROM warm_pool WHERE combo = ? ORDER BY id LIMIT 1", (key,)
+            ).fetchone()
+            if row is not None:
+                cur = self._conn.execute("DELETE FROM warm_pool WHERE id = ?", (row[0],))
+                if cur.rowcount == 0:  # another process took it first
+                    row = None
+            self.counters["hits" if row else "misses"] += 1
+        return json.loads(row[1]) if row else None
+
+    def put(self, combo, payload: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO warm_pool (combo, payload, created) VALUES (?, ?, ?)",
+                (self._combo_key(combo), json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+
+    def refill(self, combo) -> None:
+        """Schedule a background top-up of *combo*; no-op if one is running."""
+        combo = tuple(combo)
+        with self._lock:
+            if combo in self._refilling:
+                return
+            self._refilling.add(combo)
+        self.submit(self._fill, combo)
+
+    def prefill(self, combos) -> None:
+        for combo in combos:
+            self.refill(combo)
+
+    def _fill(self, combo) -> None:
+        try:
+            while self.size(combo) < self.depth:
+                self._limiter.wait()
+                try:
+                    payload = self.producer(combo)
+                except Exception:
+                    payload = None
+                if not payload:
+                    with self._lock:
+                        self.counters["errors"] += 1
+                    return
+                self.put(combo, payload)
+                with self._lock:
+                    self.counters["produced"] += 1
+        finally:
+            with self._lock:
+                self._refilling.discard(combo)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["ready"] = self._conn.execute("SELECT COUNT(*) FROM warm_pool").fetchone()[0]
+            stats["refilling"] = len(self._refilling)
+        return stats